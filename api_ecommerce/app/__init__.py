@@ -1,25 +1,76 @@
-from flask import Flask, g
+import atexit
+from typing import Optional
+from flask import Flask
+from sqlalchemy import Engine
 from api_ecommerce.app.products.routes import products_print
 from api_ecommerce.app.auth.routes import auth_print
 from api_ecommerce.app.commands.routes import commands_print
-from api_ecommerce.models import build_engine
-from api_ecommerce.config import DATABASE_SQL
-from sqlalchemy.orm import sessionmaker
+from api_ecommerce.app.exports.routes import exports_print
+from api_ecommerce.app.auth.checks import init_user_cache
+from api_ecommerce.app.auth.hashing import HashPool
+from api_ecommerce.app.database import init_database
+from api_ecommerce.app.cache import build_cache
+from api_ecommerce.app.json_provider import init_json_provider
+from api_ecommerce.app.metrics import init_metrics
+from api_ecommerce.models import build_engine, build_read_engine
+from api_ecommerce.config import (
+    DATABASE_READ_URL,
+    DATABASE_SQL,
+    DATABASE_URL,
+    HASH_QUEUE_SIZE,
+    HASH_TIMEOUT,
+    HASH_WORKERS,
+    JSON_PROVIDER,
+    PASSWORD_HASH_METHOD,
+    PRODUCT_CACHE_BACKEND,
+    PRODUCT_CACHE_SIZE,
+    PRODUCT_CACHE_TTL,
+    USER_CACHE_BACKEND,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+)
 
 
-def create_app():
+def create_app(
+    database: Optional[str] = None,
+    engine: Optional[Engine] = None,
+    read_engine: Optional[Engine] = None,
+) -> Flask:
+    """
+    Create the API application.
+
+    Args:
+        database (str, optional): URL of the database to serve, or name of a SQLite
+                                  database of DATABASE_DIR (default: the
+                                  DATABASE_URL setting, else DATABASE_SQL).
+        engine (Engine, optional): Engine to serve instead of 'database'.
+        read_engine (Engine, optional): Engine of the read-only routes (default:
+                                        built from 'database' and the
+                                        DATABASE_READ_URL setting, else 'engine').
+
+    Returns:
+        Flask: The application.
+    """
     app = Flask(__name__)
 
+    init_json_provider(app, JSON_PROVIDER)
     app.register_blueprint(products_print, url_prefix="/api/")
     app.register_blueprint(auth_print, url_prefix="/api/auth/")
     app.register_blueprint(commands_print, url_prefix="/api/")
-    app.session_factory = sessionmaker(bind=build_engine(DATABASE_SQL)[0])
-
-    def inject_session():
-        if not hasattr(g, "db_session"):
-            session_factory = getattr(app, "session_factory", None)
-            if session_factory is not None:
-                g.db_session = session_factory()
-
-    app.before_request(inject_session)
+    app.register_blueprint(exports_print, url_prefix="/api/")
+    if engine is None:
+        engine = build_engine(database or DATABASE_URL or DATABASE_SQL)[0]
+        read_engine = read_engine or build_read_engine(engine, DATABASE_READ_URL)
+    init_database(app, engine, read_engine)
+    init_metrics(app, engine, read_engine)
+    app.product_cache = build_cache(
+        PRODUCT_CACHE_BACKEND, PRODUCT_CACHE_SIZE, PRODUCT_CACHE_TTL
+    )
+    init_user_cache(
+        app, build_cache(USER_CACHE_BACKEND, USER_CACHE_SIZE, USER_CACHE_TTL)
+    )
+    app.hash_pool = HashPool(
+        PASSWORD_HASH_METHOD, HASH_WORKERS, HASH_QUEUE_SIZE, HASH_TIMEOUT
+    )
+    atexit.register(app.hash_pool.shutdown)
     return app
@@ -0,0 +1,201 @@
+import io
+import sys
+from typing import Callable, Optional
+from flask import Flask
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+from api_ecommerce.app import create_app
+from api_ecommerce.app.database import ENVIRON_SESSION
+from api_ecommerce.models import build_engine, build_async_engine
+from api_ecommerce.config import DATABASE_SQL, DATABASE_URL
+
+
+class ReceiveStream(io.RawIOBase):
+    """
+    Body of a request, read from the ASGI 'receive' channel as the route consumes it.
+
+    It is read from the greenlet of the request: every message is awaited on the
+    event loop, which serves the other requests in the meantime.
+
+    Args:
+        receive (Callable): The ASGI 'receive' channel of the request.
+    """
+
+    def __init__(self, receive: Callable):
+        self._receive = receive
+        self._buffer = b""
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer and not self._done:
+            message = await_only(self._receive())
+            self._buffer = message.get("body", b"")
+            self._done = not message.get("more_body", False)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def build_environ(scope: dict, receive: Callable) -> dict:
+    """
+    Translate the scope of an ASGI HTTP request into a WSGI environ.
+
+    Args:
+        scope (dict): The ASGI scope of the request.
+        receive (Callable): The ASGI 'receive' channel, read as 'wsgi.input'.
+
+    Returns:
+        dict: The WSGI environ of the request.
+    """
+    server = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BufferedReader(ReceiveStream(receive)),
+        "wsgi.input_terminated": True,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+class AsyncApp:
+    """
+    ASGI application serving the routes of a Flask application on an asyncio engine.
+
+    Every request runs the Flask handlers in a greenlet with its own AsyncSession
+    (see AsyncSession.run_sync): the route code is unchanged, but each SQL query,
+    read of the request body and write of the response awaits on the event loop,
+    so one process keeps many requests in flight.
+
+    Args:
+        app (Flask): The application, built on the synchronous facade of 'engine'.
+        engine (AsyncEngine): The asyncio engine of the application.
+    """
+
+    def __init__(self, app: Flask, engine: AsyncEngine):
+        self.app = app
+        self.engine = engine
+        self.session_factory = async_sessionmaker(
+            engine, sync_session_class=app.session_factory.class_
+        )
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] == "websocket":
+            # No websocket route: the connection is refused (403 for the client).
+            await receive()
+            await send({"type": "websocket.close"})
+            return
+        if scope["type"] != "http":
+            return
+        environ = build_environ(scope, receive)
+        async with self.session_factory() as session:
+            await session.run_sync(self.handle, environ, send)
+
+    async def lifespan(self, receive: Callable, send: Callable) -> None:
+        """
+        Answer the lifespan events of the server, disposing the engine on shutdown.
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def handle(self, session: Session, environ: dict, send: Callable) -> None:
+        """
+        Run the Flask application on a request and send its response, in the
+        greenlet of the request.
+
+        Args:
+            session (Session): The synchronous facade of the request AsyncSession.
+            environ (dict): The WSGI environ of the request.
+            send (Callable): The ASGI 'send' channel of the request.
+        """
+        environ[ENVIRON_SESSION] = session
+        start = {}
+
+        def start_response(status: str, headers: list, exc_info=None) -> None:
+            start["status"] = int(status.split(" ", 1)[0])
+            start["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ]
+
+        def send_start() -> None:
+            if not start.get("sent"):
+                start["sent"] = True
+                await_only(
+                    send(
+                        {
+                            "type": "http.response.start",
+                            "status": start["status"],
+                            "headers": start["headers"],
+                        }
+                    )
+                )
+
+        response = self.app(environ, start_response)
+        try:
+            for chunk in response:
+                if chunk:
+                    send_start()
+                    await_only(
+                        send(
+                            {
+                                "type": "http.response.body",
+                                "body": chunk,
+                                "more_body": True,
+                            }
+                        )
+                    )
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+        send_start()
+        await_only(send({"type": "http.response.body", "body": b""}))
+
+
+def create_async_app(database: Optional[str] = None) -> AsyncApp:
+    """
+    Create the API as an ASGI application, on an aiosqlite engine.
+
+    Args:
+        database (str, optional): URL of the database to serve, or name of a SQLite
+                                  database of DATABASE_DIR (default: the
+                                  DATABASE_URL setting, else DATABASE_SQL).
+
+    Returns:
+        AsyncApp: The application, its Flask application being 'app'.
+    """
+    engine = build_engine(database or DATABASE_URL or DATABASE_SQL)[0]
+    async_engine = build_async_engine(engine)
+    engine.dispose()
+    return AsyncApp(create_app(engine=async_engine.sync_engine), async_engine)
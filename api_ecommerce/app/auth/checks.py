@@ -1,17 +1,80 @@
 import jwt
-from flask import request, jsonify, current_app
+from flask import Flask, request, jsonify, current_app
+from sqlalchemy import event
 from api_ecommerce.models import User
 from api_ecommerce.config import SECRET_KEY
+from api_ecommerce.app.cache import Cache
+from api_ecommerce.app.database import get_session
+from api_ecommerce.app.profiling import profile_call, profile_requested
 from functools import wraps
+from itertools import chain
+from typing import Optional
+
+USER_CACHED_FIELDS = ["id", "email", "name", "role"]
+# Session.info key of the IDs of the users changed in the current transaction.
+CHANGED_USERS = "changed_users"
+
+
+def init_user_cache(app: Flask, cache: Cache) -> None:
+    """
+    Attach the authenticated-user cache to an application.
+
+    The users changed or deleted by a session of the application are recorded
+    when it flushes, and invalidated once its transaction commits: a request
+    running meanwhile cannot cache the old row again after the invalidation.
+    A rollback of the transaction discards them, the cached rows being valid.
+
+    Args:
+        app (Flask): The application, whose 'session_factory' must be set.
+        cache (Cache): The cache holding users by ID.
+    """
+    app.user_cache = cache
+
+    @event.listens_for(app.session_factory, "after_flush")
+    def track_users(session, _):
+        changed = session.info.setdefault(CHANGED_USERS, set())
+        for instance in chain(session.dirty, session.deleted):
+            if isinstance(instance, User):
+                changed.add(instance.id)
+
+    @event.listens_for(app.session_factory, "after_commit")
+    def invalidate_users(session):
+        for user_id in session.info.pop(CHANGED_USERS, ()):
+            cache.invalidate(user_id)
+
+    @event.listens_for(app.session_factory, "after_soft_rollback")
+    def discard_users(session, previous_transaction):
+        # A savepoint rollback keeps the changes of the enclosing transaction.
+        if not previous_transaction.nested:
+            session.info.pop(CHANGED_USERS, None)
+
+
+def load_user(user_id: int) -> Optional[dict]:
+    """
+    Read the fields of a user needed by the authorization checks.
+
+    Args:
+        user_id (int): The unique identifier of the user.
+
+    Returns:
+        dict: The cached fields of the user, or None if the user does not exist.
+    """
+    user = get_session().query(User).filter_by(id=user_id).first()
+    if not user:
+        return None
+    return {field: getattr(user, field) for field in USER_CACHED_FIELDS}
 
 
 def user_required(pass_user: bool = False, needed_admin: bool = True):
     """
     Decorator to enforce authentication and (optionally) admin authorization for route handlers.
 
-    This decorator validates a JWT token from the 'Authorization' header, fetches the current user,
-    and verifies their permissions. It can either pass the user object as an argument to the route handler
-    or not, depending on the 'pass_user' parameter.
+    This decorator validates a JWT token from the 'Authorization' header, fetches the current user
+    through the application user cache (falling back to the request session), and verifies
+    their permissions. It can either pass the user object as an argument to the route handler
+    or not, depending on the 'pass_user' parameter. The user passed is a detached snapshot
+    holding its id, email, name and role. The handler of an admin sending the
+    'X-Profile: 1' header runs under cProfile (see profiling.profile_call).
 
     Args:
         pass_user (bool): If True, passes the User object as the first argument to the decorated function.
@@ -38,16 +101,19 @@ def user_required(pass_user: bool = False, needed_admin: bool = True):
             except jwt.InvalidTokenError:
                 return jsonify({"message": "Token invalid"}), 401
 
-            with getattr(current_app, "session_factory", None)() as session:
-                user = session.query(User).filter_by(id=user_id).first()
-                if not user:
-                    return jsonify({"message": "User not found."}), 404
-                if needed_admin and not user.role == "admin":
-                    return jsonify({"message": "Admin role is required."}), 403
-                if pass_user:
-                    return func(user, *args, **kwargs)
-                else:
-                    return func(*args, **kwargs)
+            cached = current_app.user_cache.get_or_load(
+                user_id, lambda: load_user(user_id)
+            )
+            if not cached:
+                return jsonify({"message": "User not found."}), 404
+            user = User(**cached)
+            if needed_admin and not user.role == "admin":
+                return jsonify({"message": "Admin role is required."}), 403
+            if pass_user:
+                args = (user, *args)
+            if user.role == "admin" and profile_requested():
+                return profile_call(func, *args, **kwargs)
+            return func(*args, **kwargs)
 
         return wrapper
 
@@ -0,0 +1,186 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Optional
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashPoolError(Exception):
+    """
+    Raised when a password cannot be hashed in time, the request should be retried.
+    """
+
+
+def normalize_method(method: str) -> str:
+    """
+    Complete a werkzeug hash method with its default parameters, as written in
+    the hashes it generates (e.g. 'pbkdf2:sha256' -> 'pbkdf2:sha256:1000000').
+
+    A dummy password is hashed once, so an unsupported method fails here, when
+    the application is created, instead of in every login.
+
+    Args:
+        method (str): The hash method, with or without its parameters.
+
+    Returns:
+        str: The method with all its parameters.
+
+    Raises:
+        ValueError: If werkzeug does not support the method.
+    """
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+class HashPool:
+    """
+    Bounded thread pool hashing and checking passwords out of the request threads.
+
+    pbkdf2 and scrypt release the GIL, so the workers hash in parallel while the
+    request threads serve other routes. At most 'workers' hashes run at once and
+    'queue_size' wait: beyond, or when a hash is not done within 'timeout'
+    seconds, HashPoolError is raised instead of piling up requests. Called from
+    the greenlet of an ASGI request, the wait is awaited on the event loop.
+
+    Args:
+        method (str): The werkzeug hash method of new passwords, e.g. 'pbkdf2:sha256:600000'.
+        workers (int): Number of hashing threads.
+        queue_size (int): Maximum number of hashes waiting for a thread.
+        timeout (float): Maximum time to wait for a hash, in seconds.
+    """
+
+    def __init__(self, method: str, workers: int, queue_size: int, timeout: float):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="hash")
+        self._lock = Lock()
+        self.pending = 0
+        self.running = 0
+        self.peak_queued = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.rehashed = 0
+
+    def _run(self, function: Callable, *args) -> object:
+        with self._lock:
+            self.running += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += not future.cancelled()
+
+    def submit(self, function: Callable, *args) -> object:
+        """
+        Run a function in the pool and wait for its result.
+
+        Args:
+            function (Callable): The hashing function.
+            *args: Its arguments.
+
+        Returns:
+            object: The result of the function.
+
+        Raises:
+            HashPoolError: If the queue is full or the result is not ready in time.
+        """
+        with self._lock:
+            if self.pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise HashPoolError("Too many password checks in progress.")
+            self.pending += 1
+            self.peak_queued = max(self.peak_queued, self.pending - self.workers)
+        future = self._executor.submit(self._run, function, *args)
+        future.add_done_callback(self._done)
+        try:
+            if in_greenlet():
+                return await_only(
+                    asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+                )
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise HashPoolError("Password check timed out.") from None
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop the workers, cancelling the hashes still waiting for one.
+
+        Args:
+            wait (bool): Wait for the running hashes to finish.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password with the configured method.
+        """
+        return self.submit(generate_password_hash, password, self.method)
+
+    def verify(self, hashed: str, password: str) -> bool:
+        """
+        Check a password against its hash, whatever the method of the hash.
+        """
+        return self.submit(check_password_hash, hashed, password)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Tell whether a hash was made with other parameters than the configured ones.
+        """
+        return hashed.split("$", 1)[0] != self.method
+
+    def rehash(self, hashed: str, password: str) -> Optional[str]:
+        """
+        Hash again a verified password whose hash has outdated parameters.
+
+        The caller waits for the new hash: the login that upgrades a hash pays
+        for two hashes, once per user and configuration change.
+
+        Args:
+            hashed (str): The current hash of the password.
+            password (str): The password, already checked against 'hashed'.
+
+        Returns:
+            str: The new hash, or None if the hash is up to date or the pool is busy
+                 (the password is then rehashed on a later login).
+        """
+        if not self.needs_rehash(hashed):
+            return None
+        try:
+            hashed = self.hash(password)
+        except HashPoolError:
+            return None
+        with self._lock:
+            self.rehashed += 1
+        return hashed
+
+    def stats(self) -> dict:
+        """
+        Return a consistent copy of the counters of the pool.
+
+        Returns:
+            dict: The queue depth ('queued'), the running hashes and the totals.
+        """
+        with self._lock:
+            return {
+                "method": self.method,
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "queued": self.pending - self.running,
+                "running": self.running,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "rehashed": self.rehashed,
+            }
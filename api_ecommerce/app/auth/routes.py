@@ -1,12 +1,16 @@
 import jwt
-from flask import request, jsonify, g, current_app, Blueprint
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import request, jsonify, Blueprint, current_app
 from datetime import datetime, timedelta
 from api_ecommerce.config import SECRET_KEY
 from api_ecommerce.models import User
+from api_ecommerce.app.auth.checks import user_required
+from api_ecommerce.app.auth.hashing import HashPoolError
+from api_ecommerce.app.database import get_session
 
 
 USER_REGISTER_FIELD = ["email", "password"]
+# Seconds a client should wait before retrying when the hash pool is saturated.
+HASH_RETRY_AFTER = "1"
 auth_print = Blueprint("auth", __name__)
 
 
@@ -15,6 +19,10 @@ def login() -> jsonify:
     """
     Authenticate a user and issue a JWT token if credentials are correct.
 
+    The password is checked in the hash pool of the application. A password whose
+    hash has outdated parameters (PASSWORD_HASH_METHOD changed) is hashed again
+    before answering, so that login costs two hashes.
+
     Expects:
         JSON body with 'email' and 'password' fields.
 
@@ -28,20 +36,23 @@ def login() -> jsonify:
     if len(missing_fields) > 0:
         return jsonify({"error": f"Missing fields : {missing_fields}"}), 400
 
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
 
     user = session.query(User).filter_by(email=data["email"]).first()
     if user is None:
         return jsonify({"error": f'User {data["email"]} not exist.'}), 409
 
-    if user.email == data["email"] and check_password_hash(
-        user.password, data["password"]
-    ):
+    hash_pool = current_app.hash_pool
+    try:
+        valid = hash_pool.verify(user.password, data["password"])
+    except HashPoolError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": HASH_RETRY_AFTER}
+
+    if user.email == data["email"] and valid:
+        rehashed = hash_pool.rehash(user.password, data["password"])
+        if rehashed:
+            user.password = rehashed
+            session.commit()
         token = jwt.encode(
             {
                 "user_id": user.id,
@@ -72,20 +83,17 @@ def register() -> jsonify:
     if len(missing_fields) > 0:
         return jsonify({"error": f"Missing fields : {missing_fields}"}), 400
 
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
 
     if session.query(User).filter_by(email=data["email"]).first():
         return jsonify({"error": f'User {data["email"]} already exist.'}), 409
 
     try:
-        hashed_password = generate_password_hash(
-            data["password"], method="pbkdf2:sha256"
-        )
+        hashed_password = current_app.hash_pool.hash(data["password"])
+    except HashPoolError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": HASH_RETRY_AFTER}
+
+    try:
         user = User(
             email=data["email"],
             password=hashed_password,
@@ -99,3 +107,17 @@ def register() -> jsonify:
         return jsonify({"error": f"Internal error: {str(e)}"}), 500
 
     return jsonify({"message": "Subscription done !"}), 201
+
+
+@auth_print.route("/hash-pool", methods=["GET"])
+@user_required(pass_user=False, needed_admin=True)
+def get_hash_pool_stats() -> jsonify:
+    """
+    Retrieve the queue depth and the counters of the password hash pool.
+
+    Requires admin privileges.
+
+    Returns:
+        Response: A JSON response containing the hash pool counters.
+    """
+    return jsonify(current_app.hash_pool.stats())
@@ -0,0 +1,207 @@
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+MISSING = object()
+
+
+class CacheBackend:
+    """
+    Interface of a key/value store used by Cache.
+
+    Implementations must be thread-safe and return MISSING for absent or expired keys.
+    """
+
+    def get(self, key: Hashable) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    In-process store bounded in size (least recently used keys are evicted first)
+    and in time (keys expire 'ttl' seconds after being set).
+
+    Args:
+        maxsize (int): Maximum number of keys kept.
+        ttl (float): Lifetime of a key, in seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedCacheBackend(CacheBackend):
+    """
+    Local stand-in for a shared cache server (memcached, Redis...).
+
+    Values are stored serialized to JSON with an expiry, as a network cache would,
+    so callers never share mutable objects and only JSON data can be cached.
+
+    Args:
+        ttl (float): Lifetime of a key, in seconds.
+        store (dict, optional): The underlying store, which several caches may share.
+    """
+
+    def __init__(self, ttl: float = 60.0, store: Optional[dict] = None):
+        self.ttl = ttl
+        self._store = {} if store is None else store
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._store.get(str(key))
+        if item is None or item[0] < time.time():
+            return MISSING
+        return json.loads(item[1])
+
+    def set(self, key: Hashable, value: Any) -> None:
+        item = (time.time() + self.ttl, json.dumps(value))
+        with self._lock:
+            self._store[str(key)] = item
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._store.pop(str(key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+
+
+CACHE_BACKENDS = {"lru": LRUCacheBackend, "shared": SharedCacheBackend}
+
+
+class Cache:
+    """
+    Read-through cache counting its hits and misses.
+
+    Args:
+        backend (CacheBackend): The store holding the cached values.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value of a key, calling 'loader' and caching its result on a miss.
+
+        A None result is returned but not cached.
+
+        Args:
+            key (Hashable): The key to look up.
+            loader (Callable): Function loading the value from the source of truth.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        value = self.backend.get(key)
+        if value is not MISSING:
+            with self._lock:
+                self.hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop a key, so the next read loads it from the source of truth.
+
+        Args:
+            key (Hashable): The key to drop.
+        """
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        """
+        Drop every key.
+        """
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        """
+        Return the hit and miss counters.
+
+        Returns:
+            dict: The 'hits', 'misses' and 'hit_ratio' of the cache.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+def build_cache(backend: str, maxsize: int, ttl: float) -> Cache:
+    """
+    Create a cache from its configuration.
+
+    Args:
+        backend (str): Name of the backend, one of CACHE_BACKENDS.
+        maxsize (int): Maximum number of keys (ignored by the shared backend).
+        ttl (float): Lifetime of a key, in seconds.
+
+    Returns:
+        Cache: The configured cache.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend : {backend}")
+    if backend == "lru":
+        return Cache(LRUCacheBackend(maxsize=maxsize, ttl=ttl))
+    return Cache(CACHE_BACKENDS[backend](ttl=ttl))
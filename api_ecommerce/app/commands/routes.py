@@ -1,9 +1,20 @@
-from flask import Blueprint, jsonify, request, current_app, g
-from sqlalchemy import select
-from api_ecommerce.models import Command, User, CommandLign, Product
+from flask import Blueprint, jsonify, request, current_app
+from sqlalchemy import select, insert
+from api_ecommerce.models import Command, User, CommandLign, Product, COMMAND_STATUS
 from datetime import datetime
 from api_ecommerce.app.auth.checks import user_required
-from api_ecommerce.app.products.routes import get_product
+from api_ecommerce.app.database import get_session, read_only
+from api_ecommerce.app.commands.stock import (
+    StockError,
+    reserve_stock,
+    describe_shortage,
+)
+from api_ecommerce.app.pagination import parse_limit, encode_cursor, decode_cursor
+from api_ecommerce.app.serializers import (
+    COMMAND_SERIALIZER,
+    COMMAND_LIST_SERIALIZER,
+    COMMAND_LIGN_SERIALIZER,
+)
 from collections import Counter
 
 
@@ -11,52 +22,118 @@ COMMAND_FIELD = ["address_delivery", "product_id"]
 commands_print = Blueprint("commands", __name__)
 
 
+def parse_command_filters(args: dict) -> list:
+    """
+    Translate the filters of the command list query string into SQL conditions.
+
+    Args:
+        args (dict): The query parameters of the request.
+
+    Returns:
+        list: The SQLAlchemy conditions to apply on the 'commands' table.
+
+    Raises:
+        ValueError: If a filter value is invalid.
+    """
+    filters = []
+    if "status" in args:
+        if args["status"] not in COMMAND_STATUS:
+            raise ValueError(f"Parameter status must be one of {COMMAND_STATUS}.")
+        filters.append(Command.status == args["status"])
+    try:
+        if "date_from" in args:
+            filters.append(
+                Command.date_command >= datetime.fromisoformat(args["date_from"])
+            )
+        if "date_to" in args:
+            filters.append(
+                Command.date_command < datetime.fromisoformat(args["date_to"])
+            )
+    except ValueError:
+        raise ValueError(
+            "Parameters date_from and date_to must be ISO dates."
+        ) from None
+    if "user_id" in args:
+        try:
+            filters.append(Command.user_id == int(args["user_id"]))
+        except ValueError:
+            raise ValueError("Parameter user_id must be an integer.") from None
+    return filters
+
+
 @commands_print.route("/commands", methods=["GET"])
+@read_only
 @user_required(pass_user=True, needed_admin=False)
 def list_commands(user: User) -> jsonify:
     """
-    Retrieve a list of commands.
+    Retrieve a page of commands, ordered by ID.
 
     If the user is a regular user, only their commands are returned.
-    If the user has higher privileges, all commands are returned.
+    If the user has higher privileges, all commands are returned,
+    optionally restricted to one user.
+
+    Query parameters:
+        limit (int): Maximum number of commands returned (default 50).
+        cursor (str): The 'next' value of the previous page.
+        status (str): Only return commands with this status.
+        date_from (str): Only return commands placed at or after this ISO date.
+        date_to (str): Only return commands placed before this ISO date.
+        user_id (int): Only return the commands of this user (admin only).
 
     Args:
         user (User): The current user making the request.
 
     Returns:
-        Response: A JSON response containing a list of commands or an error message if none are found.
+        Response: A JSON response containing the commands of the page and the 'next' cursor,
+                  an error message with status code 400 if a parameter is invalid,
+                  or 404 if no command matches.
     """
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        cursor = request.args.get("cursor")
+        after = decode_cursor(cursor, (int,))[0] if cursor else None
+        filters = parse_command_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
     if user.role == "user":
-        commands = session.query(Command).filter_by(user_id=user.id).all()
-    else:
-        commands = session.query(Command).all()
-    if not commands:
+        filters.append(Command.user_id == user.id)
+    if after is not None:
+        filters.append(Command.id > after)
+
+    session = get_session()
+    stmt = (
+        select(
+            Command.id,
+            Command.status,
+            Command.address_delivery,
+            Command.date_command,
+        )
+        .where(*filters)
+        .order_by(Command.id)
+        .limit(limit + 1)
+    )
+    commands = session.execute(stmt).all()
+    if not commands and after is None:
         return jsonify({"error": "Commands not found."}), 404
 
+    next_cursor = None
+    if len(commands) > limit:
+        commands = commands[:limit]
+        next_cursor = encode_cursor([commands[-1].id])
     return (
         jsonify(
-            [
-                {
-                    "command_id": command.id,
-                    "status": command.status,
-                    "address_delivery": command.address_delivery,
-                    "date_command": command.date_command,
-                }
-                for command in commands
-            ]
+            {
+                "commands": COMMAND_LIST_SERIALIZER.dump_many(commands),
+                "next": next_cursor,
+            }
         ),
         200,
     )
 
 
 @commands_print.route("/command/<int:command_id>", methods=["GET"])
+@read_only
 @user_required(pass_user=True, needed_admin=False)
 def get_command(user: User, command_id: int) -> jsonify:
     """
@@ -72,12 +149,7 @@ def get_command(user: User, command_id: int) -> jsonify:
     Returns:
         Response: A JSON response with the command details or an error message if not found.
     """
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
     if user.role == "user":
         command = (
             session.query(Command).filter_by(id=command_id, user_id=user.id).first()
@@ -87,17 +159,11 @@ def get_command(user: User, command_id: int) -> jsonify:
     if not command:
         return jsonify({"error": "Command not found."}), 404
 
-    return jsonify(
-        {
-            "id": command.id,
-            "status": command.status,
-            "address_delivery": command.address_delivery,
-            "date_command": command.date_command,
-        }
-    )
+    return jsonify(COMMAND_SERIALIZER.dump(command))
 
 
 @commands_print.route("/command/<int:command_id>/lign", methods=["GET"])
+@read_only
 @user_required(pass_user=True, needed_admin=False)
 def get_command_lign(user: User, command_id: int) -> jsonify:
     """
@@ -113,12 +179,7 @@ def get_command_lign(user: User, command_id: int) -> jsonify:
     Returns:
         Response: A JSON response with the command's products and details, or an error message if not found.
     """
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
     if user.role == "user":
         command = (
             session.query(Command).filter_by(id=command_id, user_id=user.id).first()
@@ -129,26 +190,19 @@ def get_command_lign(user: User, command_id: int) -> jsonify:
         return jsonify({"error": "Command not found."}), 404
 
     stmt = (
-        select(CommandLign, Product.name)
+        select(
+            CommandLign.product_id,
+            Product.name,
+            CommandLign.quantity,
+            CommandLign.price,
+        )
         .join(Product)
         .where(CommandLign.command_id == command_id)
     )
-    commands = [
-        {
-            "id": command_lign.product_id,
-            "name": product_name,
-            "quantity": command_lign.quantity,
-            "price": command_lign.price,
-        }
-        for command_lign, product_name in session.execute(stmt).all()
-    ]
     return jsonify(
         {
-            "id": command.id,
-            "status": command.status,
-            "products": commands,
-            "address_delivery": command.address_delivery,
-            "date_command": command.date_command,
+            **COMMAND_SERIALIZER.dump(command),
+            "products": COMMAND_LIGN_SERIALIZER.dump_many(session.execute(stmt)),
         }
     )
 
@@ -159,6 +213,10 @@ def create_command(user: User) -> jsonify:
     """
     Create a new command (order) with the provided data for the current user.
 
+    The ordered quantities are atomically taken out of the products stock, then the
+    command with all its lines is written in the same transaction: nothing is saved
+    if a product does not exist or has not enough stock.
+
     Args:
         user (User): The current user making the request.
 
@@ -181,13 +239,20 @@ def create_command(user: User) -> jsonify:
             400,
         )
 
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
     try:
+        count_product = Counter(int(product_id) for product_id in data["product_id"])
+        try:
+            reserve_stock(session, count_product)
+        except StockError:
+            session.rollback()
+            return jsonify({"error": describe_shortage(session, count_product)}), 500
+        prices = dict(
+            session.execute(
+                select(Product.id, Product.price).where(Product.id.in_(count_product))
+            ).all()
+        )
+
         command = Command(
             user_id=user.id,
             status="on hold",
@@ -195,53 +260,30 @@ def create_command(user: User) -> jsonify:
             address_delivery=data["address_delivery"],
         )
         session.add(command)
+        session.flush()
+        result = COMMAND_SERIALIZER.dump(
+            command, ["id", "user_id", "date_command", "address_delivery"]
+        )
+        session.execute(
+            insert(CommandLign),
+            [
+                {
+                    "product_id": product_id,
+                    "command_id": command.id,
+                    "quantity": count,
+                    "price": prices[product_id],
+                }
+                for product_id, count in count_product.items()
+            ],
+        )
         session.commit()
-
-        count_product = Counter(data["product_id"])
-
-        for product_id, count in count_product.items():
-            try:
-                product = get_product(int(product_id)).get_json()
-
-                if product["stock"] - count > 0:
-                    command_lign = CommandLign(
-                        product_id=product["id"],
-                        command_id=command.id,
-                        quantity=count,
-                        price=product["price"],
-                    )
-                    session.add(command_lign)
-                    session.commit()
-                else:
-                    return (
-                        jsonify(
-                            {
-                                "error": f"Product quantity is not sufficient {count} > {product["stock"]} for {product["name"]}."
-                            }
-                        ),
-                        500,
-                    )
-            except AttributeError:
-                session.rollback()
-                return (
-                    jsonify({"error": f"Product id : {product_id} not exist."}),
-                    500,
-                )
     except Exception as e:
         session.rollback()
         return jsonify({"error": f"Internal error: {str(e)}"}), 500
 
-    return (
-        jsonify(
-            {
-                "id": command.id,
-                "user_id": command.user_id,
-                "date_command": command.date_command,
-                "address_delivery": command.address_delivery,
-            }
-        ),
-        201,
-    )
+    for product_id in count_product:
+        current_app.product_cache.invalidate(product_id)
+    return jsonify(result), 201
 
 
 @commands_print.route("/command/<int:command_id>", methods=["PATCH"])
@@ -263,12 +305,7 @@ def update_command_status(command_id: int) -> jsonify:
 
     if "status" not in data.keys():
         return jsonify({"error": "Command status must be set."}), 404
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
     command = session.query(Command).filter_by(id=command_id).first()
     if not command:
         return jsonify({"error": "Command not found."}), 404
@@ -276,11 +313,4 @@ def update_command_status(command_id: int) -> jsonify:
     command.status = data["status"]
     session.commit()
 
-    return jsonify(
-        {
-            "id": command.id,
-            "status": command.status,
-            "address_delivery": command.address_delivery,
-            "date_command": command.date_command,
-        }
-    )
+    return jsonify(COMMAND_SERIALIZER.dump(command))
@@ -0,0 +1,85 @@
+from typing import Dict
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from api_ecommerce.models import Product
+from api_ecommerce.app.products.etags import bump_catalog_version
+
+
+class StockError(Exception):
+    """
+    Raised when the stock of one or more products cannot cover an order.
+
+    Attributes:
+        quantities (dict): The requested quantity of each product of the order.
+    """
+
+    def __init__(self, quantities: Dict[int, int]):
+        super().__init__("Insufficient stock.")
+        self.quantities = quantities
+
+
+def reserve_stock(session: Session, quantities: Dict[int, int]) -> None:
+    """
+    Atomically take the ordered quantities out of the products stock.
+
+    Each product is decremented by a conditional 'UPDATE ... SET stock = stock - n
+    WHERE id = :id AND stock >= n', sent as a single executemany. The database
+    only applies a decrement while enough stock is left, so concurrent orders
+    can neither oversell a product nor lose an update. The catalog version is
+    incremented with the stock, as the product listings show it.
+
+    The caller owns the transaction: it must roll back when StockError is raised.
+
+    Args:
+        session (Session): The session whose transaction holds the reservation.
+        quantities (dict): The quantity to reserve for each product ID.
+
+    Raises:
+        StockError: If a product does not exist or has not enough stock.
+    """
+    stmt = (
+        update(Product.__table__)
+        .where(
+            Product.__table__.c.id == bindparam("product_id"),
+            Product.__table__.c.stock >= bindparam("quantity"),
+        )
+        .values(stock=Product.__table__.c.stock - bindparam("quantity"))
+    )
+    result = session.connection().execute(
+        stmt,
+        [
+            {"product_id": product_id, "quantity": quantity}
+            for product_id, quantity in quantities.items()
+        ],
+    )
+    if result.rowcount != len(quantities):
+        raise StockError(quantities)
+    bump_catalog_version(session)
+
+
+def describe_shortage(session: Session, quantities: Dict[int, int]) -> str:
+    """
+    Explain why a reservation failed, reading the current stock of the products.
+
+    Args:
+        session (Session): A session outside of the failed transaction.
+        quantities (dict): The quantity requested for each product ID.
+
+    Returns:
+        str: The error message for the first product that cannot be ordered.
+    """
+    products = {
+        product.id: product
+        for product in session.execute(
+            select(Product.id, Product.name, Product.stock).where(
+                Product.id.in_(quantities)
+            )
+        )
+    }
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            return f"Product id : {product_id} not exist."
+        if (product.stock or 0) < quantity:
+            return f"Product quantity is not sufficient {quantity} > {product.stock} for {product.name}."
+    return "Product stock changed during the command, please retry."
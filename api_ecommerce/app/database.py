@@ -0,0 +1,147 @@
+from functools import wraps
+from threading import Lock
+from typing import Optional
+from flask import Flask, g, current_app, request, has_request_context
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+# WSGI environ key of the session opened by the ASGI adapter (see app/asgi.py).
+ENVIRON_SESSION = "api_ecommerce.db_session"
+
+
+class PoolMetrics:
+    """
+    Thread-safe counters describing how the connection pool of an engine is used.
+
+    Attributes:
+        connects (int): Number of DBAPI connections opened by the pool.
+        checkouts (int): Number of times a connection was checked out of the pool.
+        checkins (int): Number of times a connection was returned to the pool.
+        checked_out (int): Number of connections currently checked out.
+        peak_checked_out (int): Highest number of connections checked out at once.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+
+    def on_connect(self, *_) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, *_) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, *_) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self) -> dict:
+        """
+        Return a consistent copy of the counters.
+
+        Returns:
+            dict: The current value of every counter.
+        """
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+def init_database(
+    app: Flask, engine: Engine, read_engine: Optional[Engine] = None
+) -> None:
+    """
+    Attach the request-scoped session subsystem to a Flask application.
+
+    - Exposes 'app.session_factory' bound to the given engine, and
+      'app.read_session_factory' bound to the read engine (see read_only).
+    - Records pool usage of both engines in 'app.pool_metrics'.
+    - Closes (and rolls back on error) the request session when the app context ends.
+
+    Args:
+        app (Flask): The application to configure.
+        engine (Engine): The SQLAlchemy engine used by the application.
+        read_engine (Engine, optional): The engine of the read-only routes
+                                        (default: 'engine').
+    """
+    read_engine = read_engine or engine
+    app.session_factory = sessionmaker(bind=engine)
+    app.read_session_factory = sessionmaker(bind=read_engine)
+    app.pool_metrics = PoolMetrics()
+    for pool_engine in {engine, read_engine}:
+        event.listen(pool_engine, "connect", app.pool_metrics.on_connect)
+        event.listen(pool_engine, "checkout", app.pool_metrics.on_checkout)
+        event.listen(pool_engine, "checkin", app.pool_metrics.on_checkin)
+    app.teardown_appcontext(close_session)
+
+
+def read_only(func):
+    """
+    Route decorator opening the session of the request on the read engine.
+
+    Put it right under the route, so the authentication decorator reads the
+    user from the same session. The route must not write: the read engine
+    may be a read-only connection or a replica. Under the ASGI adapter, the
+    AsyncSession of the request is used whatever the route.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = True
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def get_session() -> Session:
+    """
+    Return the session of the current request, opening it on first use.
+
+    The same session is shared by the authentication decorator and the route
+    handler, so a request checks out at most one connection. It is opened on
+    the read engine for the routes decorated with read_only. Under the ASGI
+    adapter, it is the synchronous facade of the AsyncSession of the request.
+
+    Returns:
+        Session: The SQLAlchemy session bound to the current request.
+    """
+    if "db_session" not in g:
+        session = has_request_context() and request.environ.get(ENVIRON_SESSION)
+        if not session:
+            session = (
+                current_app.read_session_factory()
+                if g.get("db_read_only")
+                else current_app.session_factory()
+            )
+        g.db_session = session
+    return g.db_session
+
+
+def close_session(exception: Optional[BaseException] = None) -> None:
+    """
+    Release the session of the current request, if one was opened.
+
+    Args:
+        exception (BaseException, optional): The error that ended the request, if any.
+            Pending changes are rolled back when it is set.
+    """
+    session = g.pop("db_session", None)
+    if session is None:
+        return
+    if exception is not None:
+        session.rollback()
+    session.close()
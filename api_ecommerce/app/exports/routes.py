@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import Table, select
+from api_ecommerce.models import Product, Command, CommandLign
+from api_ecommerce.app.auth.checks import user_required
+from api_ecommerce.app.database import get_session
+from api_ecommerce.config import EXPORT_BATCH_SIZE
+
+EXPORT_TABLES = {
+    table.name: table
+    for table in (Product.__table__, Command.__table__, CommandLign.__table__)
+}
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+exports_print = Blueprint("exports", __name__)
+
+
+def encode_value(value: object) -> object:
+    """
+    Convert a column value to a JSON or CSV value (datetimes in ISO 8601).
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(columns: list, batches: Iterator[list]) -> Iterator[str]:
+    """
+    Encode batches of rows as NDJSON, one JSON object per line.
+
+    Args:
+        columns (list): The column names.
+        batches (Iterator): The batches of rows.
+
+    Yields:
+        str: The lines of a batch.
+    """
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, map(encode_value, row)))) + "\n"
+            for row in rows
+        )
+
+
+def encode_csv(columns: list, batches: Iterator[list]) -> Iterator[str]:
+    """
+    Encode batches of rows as CSV, with a header row.
+
+    Args:
+        columns (list): The column names.
+        batches (Iterator): The batches of rows.
+
+    Yields:
+        str: The header, then the lines of a batch.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([map(encode_value, row) for row in rows])
+        yield buffer.getvalue()
+
+
+def stream_table(table: Table, batch_size: int) -> Iterator[list]:
+    """
+    Read all the rows of a table ordered by ID, one batch at a time.
+
+    The statement is executed with 'stream_results', so the database driver fetches
+    the rows from a server-side cursor as they are consumed instead of loading
+    the whole result.
+
+    Args:
+        table (Table): The table to read.
+        batch_size (int): Number of rows fetched at once.
+
+    Yields:
+        list: The rows of a batch.
+    """
+    result = get_session().execute(
+        select(table).order_by(table.c.id).execution_options(yield_per=batch_size)
+    )
+    for rows in result.partitions():
+        yield rows
+
+
+@exports_print.route("/export/<string:table>", methods=["GET"])
+@user_required(pass_user=False, needed_admin=True)
+def export_table(table: str) -> Response:
+    """
+    Export all the rows of a table as a stream of NDJSON or CSV.
+
+    Requires admin privileges.
+
+    The rows are read and encoded EXPORT_BATCH_SIZE at a time while the response is
+    sent, so the export starts at once and its memory use does not depend on the
+    size of the table.
+
+    Query parameters:
+        format (str): 'ndjson' (default) or 'csv'.
+
+    Args:
+        table (str): 'products', 'commands' or 'commands_lign'.
+
+    Returns:
+        Response: The streamed rows, ordered by ID, or an error message with status
+                  code 404 if the table is unknown or 400 if the format is unknown.
+    """
+    if table not in EXPORT_TABLES:
+        return jsonify({"error": f"Table must be one of {list(EXPORT_TABLES)}."}), 404
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format must be one of {list(EXPORT_FORMATS)}."}), 400
+
+    columns = [column.name for column in EXPORT_TABLES[table].columns]
+    batches = stream_table(EXPORT_TABLES[table], EXPORT_BATCH_SIZE)
+    encode = encode_csv if fmt == "csv" else encode_ndjson
+    return Response(
+        stream_with_context(encode(columns, batches)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={table}.{fmt}"},
+    )
@@ -0,0 +1,115 @@
+import datetime
+from typing import Any
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+HTTP_DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HTTP_MONTHS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+def http_date(value: datetime.date) -> str:
+    """
+    Format a date as the default provider does (werkzeug's http_date), faster.
+
+    Naive datetimes are assumed to be in UTC and dates at midnight UTC.
+
+    Args:
+        value (date): The date or datetime to format.
+
+    Returns:
+        str: The RFC 2822 date, e.g. 'Thu, 02 Jan 2025 03:04:05 GMT'.
+    """
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    elif value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return (
+        f"{HTTP_DAYS[value.weekday()]}, {value.day:02d} {HTTP_MONTHS[value.month - 1]} "
+        f"{value.year:04d} {value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+    )
+
+
+def default(value: Any) -> Any:
+    """
+    Encode the values orjson does not handle natively, as the default provider.
+    """
+    if isinstance(value, datetime.date):
+        return http_date(value)
+    return _default(value)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider encoding the responses with orjson (optional dependency 'fast').
+
+    The output is the one of the default provider: sorted keys, compact separators,
+    dates in the HTTP format and the same fallbacks (Decimal, UUID, dataclasses...).
+    Only non-ASCII characters are written as UTF-8 instead of being escaped.
+    """
+
+    options = (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if orjson
+        else 0
+    )
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=default, option=self.options).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if self._app.debug or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(
+            obj, default=default, option=self.options | orjson.OPT_APPEND_NEWLINE
+        )
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {"default": DefaultJSONProvider, "orjson": OrjsonProvider}
+
+
+def init_json_provider(app: Flask, provider: str) -> None:
+    """
+    Set the JSON provider used by 'jsonify' and 'request.get_json'.
+
+    The orjson provider falls back to the default one when orjson is not installed.
+
+    Args:
+        app (Flask): The application.
+        provider (str): Name of the provider, one of JSON_PROVIDERS.
+
+    Raises:
+        ValueError: If the provider is unknown.
+    """
+    if provider not in JSON_PROVIDERS:
+        raise ValueError(f"Unknown JSON provider : {provider}")
+    if provider == "orjson" and orjson is None:
+        provider = "default"
+    app.json = JSON_PROVIDERS[provider](app)
@@ -0,0 +1,254 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+from flask import Blueprint, Flask, Response, current_app, g, request
+from sqlalchemy import Engine, event
+
+# Upper bounds of the histogram buckets, the last one being +Inf.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SQL_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# SQL statements and time of the current request: [statements, seconds].
+request_sql: ContextVar[Optional[list]] = ContextVar("request_sql", default=None)
+metrics_print = Blueprint("metrics", __name__)
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus layout, not thread-safe on its own.
+
+    Args:
+        buckets (tuple): The sorted upper bounds of the buckets.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: str) -> List[str]:
+        """
+        Format the buckets, the sum and the count of the histogram.
+
+        Args:
+            name (str): The name of the metric.
+            labels (str): The labels of the series, formatted as 'key="value",'.
+
+        Returns:
+            list: The lines of the histogram.
+        """
+        lines = []
+        total = 0
+        for bound, count in zip([*self.buckets, "+Inf"], self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{labels.rstrip(',')}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels.rstrip(',')}}} {self.count}")
+        return lines
+
+
+class RequestMetrics:
+    """
+    Thread-safe counters of the requests served, by endpoint.
+
+    Each request takes the lock once, when it ends: the SQL statements are
+    counted in a context variable of the request, without locking.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.sql_statements: Dict[str, Histogram] = {}
+        self.sql_time: Dict[str, Histogram] = {}
+
+    def record(
+        self,
+        endpoint: str,
+        method: str,
+        status: int,
+        duration: float,
+        statements: int,
+        sql_time: float,
+    ) -> None:
+        """
+        Record a served request.
+
+        Args:
+            endpoint (str): The Flask endpoint of the request.
+            method (str): The HTTP method.
+            status (int): The status code of the response.
+            duration (float): The time spent handling the request, in seconds.
+            statements (int): The number of SQL statements executed.
+            sql_time (float): The time spent executing them, in seconds.
+        """
+        key = (endpoint, method, status)
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if endpoint not in self.latency:
+                self.latency[endpoint] = Histogram(LATENCY_BUCKETS)
+                self.sql_statements[endpoint] = Histogram(SQL_STATEMENT_BUCKETS)
+                self.sql_time[endpoint] = Histogram(SQL_TIME_BUCKETS)
+            self.latency[endpoint].observe(duration)
+            self.sql_statements[endpoint].observe(statements)
+            self.sql_time[endpoint].observe(sql_time)
+
+    def render(self) -> List[str]:
+        """
+        Format the counters in the Prometheus text format.
+
+        Returns:
+            list: The lines of the request metrics.
+        """
+        with self._lock:
+            lines = [
+                "# HELP api_requests_total Requests served, by endpoint and status.",
+                "# TYPE api_requests_total counter",
+            ]
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'api_requests_total{{endpoint="{endpoint}",method="{method}",'
+                    f'status="{status}"}} {count}'
+                )
+            for name, description, histograms in (
+                (
+                    "api_request_duration_seconds",
+                    "Time spent handling a request.",
+                    self.latency,
+                ),
+                (
+                    "api_request_sql_statements",
+                    "SQL statements executed by a request.",
+                    self.sql_statements,
+                ),
+                (
+                    "api_request_sql_duration_seconds",
+                    "Time spent in SQL statements by a request.",
+                    self.sql_time,
+                ),
+            ):
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for endpoint, histogram in sorted(histograms.items()):
+                    lines.extend(histogram.samples(name, f'endpoint="{endpoint}",'))
+            return lines
+
+
+def gauges(name: str, description: str, values: dict, kind: str = "gauge") -> list:
+    """
+    Format the numeric values of a stats dict as one metric per key.
+
+    Args:
+        name (str): The prefix of the metrics.
+        description (str): The description of the stats.
+        values (dict): The stats, the non numeric ones are skipped.
+        kind (str): The Prometheus type of the metrics.
+
+    Returns:
+        list: The lines of the metrics.
+    """
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# HELP {name}_{key} {description} ({key}).")
+            lines.append(f"# TYPE {name}_{key} {kind}")
+            lines.append(f"{name}_{key} {value}")
+    return lines
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if request_sql.get() is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = request_sql.get()
+    if stats is not None and hasattr(context, "_metrics_start"):
+        stats[0] += 1
+        stats[1] += time.perf_counter() - context._metrics_start
+
+
+def start_request() -> None:
+    g.metrics_start = time.perf_counter()
+    g.metrics_sql = request_sql.set([0, 0.0])
+
+
+def end_request(response: Response) -> Response:
+    g.metrics_status = response.status_code
+    return response
+
+
+def record_request(exception: Optional[BaseException] = None) -> None:
+    if "metrics_start" not in g:
+        return
+    statements, sql_time = request_sql.get() or (0, 0.0)
+    request_sql.reset(g.metrics_sql)
+    current_app.request_metrics.record(
+        request.endpoint or "unmatched",
+        request.method,
+        g.get("metrics_status", 500),
+        time.perf_counter() - g.metrics_start,
+        statements,
+        sql_time,
+    )
+
+
+def init_metrics(
+    app: Flask, engine: Engine, read_engine: Optional[Engine] = None
+) -> None:
+    """
+    Attach the instrumentation layer to an application.
+
+    - Exposes the counters in 'app.request_metrics'.
+    - Times every request and counts its SQL statements and SQL time through
+      the cursor events of the engines.
+    - Serves every metric of the application on '/metrics' (Prometheus format).
+
+    Args:
+        app (Flask): The application to instrument.
+        engine (Engine): The engine used by the application.
+        read_engine (Engine, optional): The engine of its read-only routes.
+    """
+    app.request_metrics = RequestMetrics()
+    for sql_engine in {engine, read_engine or engine}:
+        event.listen(sql_engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(sql_engine, "after_cursor_execute", after_cursor_execute)
+    app.before_request(start_request)
+    app.after_request(end_request)
+    app.teardown_request(record_request)
+    app.register_blueprint(metrics_print)
+
+
+@metrics_print.route("/metrics", methods=["GET"])
+def get_metrics() -> Response:
+    """
+    Expose the metrics of the application in the Prometheus text format.
+
+    The requests by endpoint, their latency and SQL histograms, the connection
+    pool, the product cache and the password hash pool. Meant for a scraper on
+    the internal network: restrict '/metrics' at the reverse proxy.
+
+    Returns:
+        Response: The metrics, as text.
+    """
+    lines = current_app.request_metrics.render()
+    lines += gauges(
+        "api_db_pool", "Connection pool usage", current_app.pool_metrics.snapshot()
+    )
+    lines += gauges(
+        "api_product_cache", "Product cache usage", current_app.product_cache.stats()
+    )
+    lines += gauges(
+        "api_hash_pool", "Password hash pool usage", current_app.hash_pool.stats()
+    )
+    return Response("\n".join(lines) + "\n", content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,123 @@
+import base64
+import json
+from typing import List, Optional
+from sqlalchemy import tuple_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def parse_limit(value: Optional[str]) -> int:
+    """
+    Validate the 'limit' query parameter of a paginated listing.
+
+    Args:
+        value (str, optional): The raw query parameter, None when absent.
+
+    Returns:
+        int: The page size, DEFAULT_LIMIT when the parameter is absent.
+
+    Raises:
+        ValueError: If the value is not an integer between 1 and MAX_LIMIT.
+    """
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("Parameter limit must be an integer.") from None
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"Parameter limit must be between 1 and {MAX_LIMIT}.")
+    return limit
+
+
+def parse_fields(
+    value: Optional[str], allowed: List[str], default: List[str]
+) -> List[str]:
+    """
+    Validate the 'fields' query parameter (comma separated column names).
+
+    The 'id' field is always returned since the pagination cursor is built from it.
+
+    Args:
+        value (str, optional): The raw query parameter, None when absent.
+        allowed (list): The fields a client may request.
+        default (list): The fields returned when the parameter is absent.
+
+    Returns:
+        list: The requested fields, starting with 'id'.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not value:
+        return default
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields : {unknown}")
+    return ["id"] + [field for field in dict.fromkeys(fields) if field != "id"]
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Build an opaque cursor from the sort key values of the last row of a page.
+
+    Args:
+        values (list): JSON serializable sort key values.
+
+    Returns:
+        str: A URL-safe cursor string.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: tuple) -> list:
+    """
+    Read back the sort key values stored in a cursor built by encode_cursor.
+
+    Args:
+        cursor (str): The cursor sent by the client.
+        types (tuple): The expected type (or tuple of types) of each value.
+
+    Returns:
+        list: The sort key values of the last row of the previous page.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.") from None
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        or not all(
+            isinstance(value, expected) and not isinstance(value, bool)
+            for value, expected in zip(values, types)
+        )
+    ):
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def keyset_condition(keys: list, values: list, descending: bool = False):
+    """
+    Build the condition selecting the rows after a cursor, for rows ordered by 'keys'.
+
+    Args:
+        keys (list): The columns the rows are ordered by, the last one being unique.
+        values (list): The values of these columns in the last row of the previous page.
+        descending (bool): True if the rows are ordered by descending keys.
+
+    Returns:
+        ColumnElement: The SQL condition, a row value comparison for several keys.
+    """
+    if len(keys) == 1:
+        return keys[0] < values[0] if descending else keys[0] > values[0]
+    if descending:
+        return tuple_(*keys) < tuple_(*values)
+    return tuple_(*keys) > tuple_(*values)
@@ -0,0 +1,170 @@
+import codecs
+import csv
+import json
+import math
+import time
+from datetime import datetime
+from typing import IO, Iterator, Tuple
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from api_ecommerce.models import Product
+from api_ecommerce.app.products.etags import bump_catalog_version
+
+BULK_FORMATS = {"application/x-ndjson": "ndjson", "text/csv": "csv"}
+BULK_MAX_ERRORS = 100
+
+
+def read_records(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, object]]:
+    """
+    Read the records of an NDJSON or CSV stream one line at a time.
+
+    Args:
+        stream (IO[bytes]): The request body.
+        fmt (str): 'ndjson' (one JSON object per line) or 'csv' (with a header row).
+
+    Yields:
+        tuple: The line number of the record and the record, or the ValueError
+               raised while decoding it.
+    """
+    lines = codecs.iterdecode(stream, "utf-8")
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_num, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except ValueError as e:
+            yield line_num, ValueError(f"Invalid JSON : {e}")
+
+
+def validate_record(record: object, fields: list, now: datetime) -> dict:
+    """
+    Check a record holds the required product fields and convert their values.
+
+    Args:
+        record (object): The decoded record.
+        fields (list): The required fields.
+        now (datetime): Creation date given to new products.
+
+    Returns:
+        dict: The row to upsert in the 'products' table.
+
+    Raises:
+        ValueError: If the record is invalid, or its price or stock is not a
+                    positive finite number.
+    """
+    if isinstance(record, ValueError):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("Record must be an object.")
+    missing_fields = [field for field in fields if record.get(field) in (None, "")]
+    if missing_fields:
+        raise ValueError(f"Missing fields : {missing_fields}")
+    try:
+        price = float(record["price"])
+        stock = int(record.get("stock") or 0)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Fields price and stock must be numbers.") from None
+    if not math.isfinite(price) or price < 0:
+        raise ValueError("Field price must be a positive number.")
+    if stock < 0:
+        raise ValueError("Field stock must be a positive integer.")
+    return {
+        "name": str(record["name"]),
+        "description": str(record["description"]),
+        "category": str(record["category"]),
+        "price": price,
+        "stock": stock,
+        "date_creation": now,
+    }
+
+
+def upsert_products(session: Session, rows: list) -> None:
+    """
+    Insert products, or update the existing products with the same name,
+    with a single executemany.
+
+    Args:
+        session (Session): The session used to write.
+        rows (list): The rows built by validate_record.
+    """
+    stmt = insert(Product.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={
+            field: stmt.excluded[field]
+            for field in ("description", "category", "price", "stock")
+        },
+    )
+    session.execute(stmt, rows)
+
+
+def import_products(
+    session: Session,
+    records: Iterator[Tuple[int, object]],
+    fields: list,
+    chunk_size: int,
+) -> dict:
+    """
+    Validate and upsert a stream of product records, one committed chunk at a time.
+
+    At most 'chunk_size' rows are held in memory. A chunk rejected by the database
+    is rolled back as a whole and reported as one error. An undecodable body stops
+    the import after the rows already read.
+
+    Args:
+        session (Session): The session used to write.
+        records (Iterator): The records yielded by read_records.
+        fields (list): The required fields.
+        chunk_size (int): Number of rows per executemany and commit.
+
+    Returns:
+        dict: The import report: rows read, imported and rejected, the first
+              BULK_MAX_ERRORS errors, duration and throughput.
+    """
+    start = time.perf_counter()
+    now = datetime.now()
+    report = {"read": 0, "imported": 0, "rejected": 0, "errors": []}
+
+    def reject(line: int, error: str, count: int = 1) -> None:
+        report["rejected"] += count
+        if len(report["errors"]) < BULK_MAX_ERRORS:
+            report["errors"].append({"line": line, "error": error})
+
+    def flush(chunk: list) -> None:
+        try:
+            upsert_products(session, [row for _, row in chunk])
+            bump_catalog_version(session)
+            session.commit()
+            report["imported"] += len(chunk)
+        except Exception as e:
+            session.rollback()
+            reject(
+                chunk[0][0], f"Chunk of {len(chunk)} rows rejected : {e}", len(chunk)
+            )
+
+    chunk = []
+    try:
+        for line, record in records:
+            report["read"] += 1
+            try:
+                chunk.append((line, validate_record(record, fields, now)))
+            except ValueError as e:
+                reject(line, str(e))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+    except (UnicodeDecodeError, csv.Error) as e:
+        report["errors"].append({"line": None, "error": f"Unreadable body : {e}"})
+    if chunk:
+        flush(chunk)
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["rows_per_second"] = (
+        round(report["read"] / report["seconds"]) if report["seconds"] else None
+    )
+    return report
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from functools import wraps
+from flask import Response, current_app, g, request
+from sqlalchemy import Connection, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+from typing import Union
+from api_ecommerce.models import CatalogVersion
+from api_ecommerce.app.database import get_session
+from api_ecommerce.config import CATALOG_CACHE_CONTROL
+
+CATALOG_VERSION_ID = 1
+
+
+def bump_catalog_version(session: Union[Session, Connection]) -> None:
+    """
+    Increment the catalog version in the current transaction.
+
+    Must be called by every write to the products (including their stock), so
+    the ETags of the product listings change when their content may change.
+
+    Args:
+        session (Session | Connection): The session or connection used to write.
+    """
+    stmt = insert(CatalogVersion).values(id=CATALOG_VERSION_ID, version=1)
+    session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["id"], set_={"version": CatalogVersion.version + 1}
+        )
+    )
+
+
+def read_catalog_version(session: Session) -> int:
+    """
+    Read the catalog version, 0 if the catalog never changed.
+    """
+    version = session.scalar(
+        select(CatalogVersion.version).where(CatalogVersion.id == CATALOG_VERSION_ID)
+    )
+    return version or 0
+
+
+def make_etag(*parts: object) -> str:
+    """
+    Build a strong ETag from the parts identifying a representation.
+    """
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    """
+    Add the ETag and Cache-Control headers to a response.
+    """
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = CATALOG_CACHE_CONTROL
+    return response
+
+
+def conditional(response: Response, etag: str) -> Response:
+    """
+    Answer a conditional GET: 304 if the client holds the current content.
+
+    Args:
+        response (Response): The successful response.
+        etag (str): The ETag of its content.
+
+    Returns:
+        Response: The response with its ETag, or an empty 304 response if the
+                  client sent the same ETag in 'If-None-Match'.
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    return with_etag(response, etag)
+
+
+def catalog_conditional(func):
+    """
+    Decorator for the routes listing products: conditional GET on the catalog version.
+
+    The ETag is derived from the catalog version and the URL with its query string,
+    so an unchanged listing is answered with 304 before running its queries.
+    The version is left in 'g.catalog_version' for the route. Error responses
+    are returned without ETag.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        g.catalog_version = read_catalog_version(get_session())
+        etag = make_etag(g.catalog_version, request.full_path)
+        if request.if_none_match.contains(etag):
+            return with_etag(current_app.response_class(status=304), etag)
+        response = current_app.make_response(func(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        return with_etag(response, etag)
+
+    return wrapper
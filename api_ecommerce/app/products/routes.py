@@ -1,17 +1,64 @@
-from flask import Blueprint, jsonify, request, current_app, g
+import math
+import re
+from flask import Blueprint, g, jsonify, request, current_app
+from sqlalchemy import (
+    select,
+    table,
+    column,
+    literal_column,
+    text,
+    func,
+    cast,
+    Integer,
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from api_ecommerce.models import Product
 from datetime import datetime
+from typing import Optional
 from api_ecommerce.app.auth.checks import user_required
+from api_ecommerce.app.database import get_session, read_only
+from api_ecommerce.app.products.bulk import BULK_FORMATS, read_records, import_products
+from api_ecommerce.app.products.etags import (
+    bump_catalog_version,
+    catalog_conditional,
+    conditional,
+    make_etag,
+)
+from api_ecommerce.app.serializers import PRODUCT_SERIALIZER
+from api_ecommerce.config import PRODUCT_BULK_CHUNK_SIZE
+from api_ecommerce.app.pagination import (
+    parse_limit,
+    parse_fields,
+    encode_cursor,
+    decode_cursor,
+    keyset_condition,
+)
 
 PRODUCT_FIELD = ["name", "description", "category", "price"]
+PRODUCT_LIST_FIELDS = [col.name for col in Product.__table__.columns]
+PRODUCT_SEARCH_RANK = literal_column("bm25(products_fts, 10.0, 1.0, 2.0)")
+# Shorter words are ignored by the search: their prefix matches most products.
+SEARCH_MIN_TERM_LENGTH = 2
+products_fts = table("products_fts", column("rowid"))
+PRODUCT_SORTS = {
+    "id": ([Product.id], (int,)),
+    "price": ([Product.price, Product.id], ((int, float), int)),
+    "name": ([Product.name, Product.id], (str, int)),
+}
 products_print = Blueprint("products", __name__)
 
 
 @products_print.route("/product/<int:product_id>", methods=["GET"])
+@read_only
 def get_product(product_id: int) -> jsonify:
     """
     Retrieve the details of a single product by its ID.
 
+    The product is read through the application product cache. The response has
+    an ETag derived from the product details: a request with the same ETag in
+    'If-None-Match' gets an empty 304 response.
+
     Args:
         product_id (int): The unique identifier of the product to retrieve.
 
@@ -19,46 +66,373 @@ def get_product(product_id: int) -> jsonify:
         Response: A JSON response containing the product details if found,
                   or an error message with status code 404 if not found.
     """
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
-    product = session.query(Product).filter_by(id=product_id).first()
+    product = current_app.product_cache.get_or_load(
+        product_id, lambda: load_product(product_id)
+    )
     if not product:
         return jsonify({"error": "Product not found."}), 404
 
+    return conditional(jsonify(product), make_etag(product))
+
+
+def load_product(product_id: int) -> Optional[dict]:
+    """
+    Read the details of a product from the database.
+
+    Args:
+        product_id (int): The unique identifier of the product.
+
+    Returns:
+        dict: The product details, or None if the product does not exist.
+    """
+    product = get_session().query(Product).filter_by(id=product_id).first()
+    if not product:
+        return None
+    return PRODUCT_SERIALIZER.dump(product)
+
+
+@products_print.route("/products/cache", methods=["GET"])
+@user_required(pass_user=False, needed_admin=True)
+def get_product_cache_stats() -> jsonify:
+    """
+    Retrieve the hit and miss counters of the product cache.
+
+    Requires admin privileges.
+
+    Returns:
+        Response: A JSON response containing the cache counters.
+    """
+    return jsonify(current_app.product_cache.stats())
+
+
+@products_print.route("/products", methods=["GET"])
+@read_only
+@catalog_conditional
+def get_products() -> jsonify:
+    """
+    Retrieve a page of products, optionally filtered and sorted.
+
+    Query parameters:
+        limit (int): Maximum number of products returned (default 50).
+        cursor (str): The 'next' value of the previous page.
+        fields (str): Comma separated list of fields to return (default 'id,name').
+        category (str): Only return the products of this category.
+        min_price (float): Only return the products at or above this price.
+        max_price (float): Only return the products at or below this price.
+        sort (str): 'id' (default), 'price' or 'name', prefixed by '-' for descending order.
+
+    Returns:
+        Response: A JSON response containing the products of the page and
+                  the 'next' cursor (null on the last page),
+                  or an error message with status code 400 if a parameter is invalid.
+    """
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        fields = parse_fields(
+            request.args.get("fields"), PRODUCT_LIST_FIELDS, ["id", "name"]
+        )
+        filters = parse_product_filters(request.args)
+        sort = request.args.get("sort", "id")
+        descending = sort.startswith("-")
+        if sort.lstrip("-") not in PRODUCT_SORTS:
+            raise ValueError(f"Parameter sort must be one of {list(PRODUCT_SORTS)}.")
+        keys, types = PRODUCT_SORTS[sort.lstrip("-")]
+        cursor = request.args.get("cursor")
+        if cursor:
+            filters.append(
+                keyset_condition(keys, decode_cursor(cursor, types), descending)
+            )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    session = get_session()
+    key_names = [key.name for key in keys]
+    stmt = (
+        select(
+            *[Product.__table__.c[field] for field in fields],
+            *[key for key in keys if key.name not in fields],
+        )
+        .where(*filters)
+        .order_by(*[key.desc() if descending else key for key in keys])
+        .limit(limit + 1)
+    )
+    products = session.execute(stmt).all()
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor([getattr(products[-1], key) for key in key_names])
     return jsonify(
         {
-            "id": product.id,
-            "name": product.name,
-            "description": product.description,
-            "category": product.category,
-            "price": product.price,
-            "stock": product.stock,
+            "products": PRODUCT_SERIALIZER.dump_many(products, fields),
+            "next": next_cursor,
         }
     )
 
 
-@products_print.route("/products", methods=["GET"])
-def get_products() -> jsonify:
+@products_print.route("/products/facets", methods=["GET"])
+@catalog_conditional
+def get_product_facets() -> jsonify:
+    """
+    Count the products per category and per price range.
+
+    Each facet applies the filters of the other one: the category counts follow
+    the price range, the price histogram follows the category.
+    The aggregates scan the (category, id) and (price, id) indexes, so their
+    result is cached per catalog version: until the next product write, the
+    same facets are answered without aggregating again.
+
+    Query parameters:
+        category (str): Restrict the price histogram to this category.
+        min_price (float): Restrict the category counts to products at or above this price.
+        max_price (float): Restrict the category counts to products at or below this price.
+        buckets (int): Number of ranges of the price histogram (default 10, at most 100).
+
+    Returns:
+        Response: A JSON response containing the 'categories' counts and the 'price'
+                  histogram, or an error message with status code 400 if a parameter is invalid.
+    """
+    try:
+        category_filters = parse_category_filter(request.args)
+        price_filters = parse_price_filters(request.args)
+        buckets = request.args.get("buckets", "10")
+        if not buckets.isdigit() or not 1 <= int(buckets) <= 100:
+            raise ValueError("Parameter buckets must be between 1 and 100.")
+        buckets = int(buckets)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    key = (
+        "facets",
+        g.catalog_version,
+        request.args.get("category"),
+        request.args.get("min_price"),
+        request.args.get("max_price"),
+        buckets,
+    )
+    facets = current_app.product_cache.get_or_load(
+        key,
+        lambda: compute_facets(get_session(), category_filters, price_filters, buckets),
+    )
+    return jsonify(facets)
+
+
+def compute_facets(
+    session: Session, category_filters: list, price_filters: list, buckets: int
+) -> dict:
+    """
+    Aggregate the category counts and the price histogram of the products.
+
+    Args:
+        session (Session): The session of the request.
+        category_filters (list): The conditions of the price histogram.
+        price_filters (list): The conditions of the category counts.
+        buckets (int): Number of ranges of the price histogram.
+
+    Returns:
+        dict: The 'categories' counts and the 'price' histogram.
+    """
+    categories = session.execute(
+        select(Product.category, func.count())
+        .where(*price_filters)
+        .group_by(Product.category)
+        .order_by(Product.category)
+    ).all()
+
+    low, high = session.execute(
+        select(func.min(Product.price), func.max(Product.price)).where(
+            *category_filters
+        )
+    ).one()
+    histogram = []
+    if low is not None:
+        width = (high - low) / buckets or 1
+        bucket = func.min(
+            cast((Product.price - low) / width, Integer), buckets - 1
+        ).label("bucket")
+        counts = dict(
+            session.execute(
+                select(bucket, func.count()).where(*category_filters).group_by(bucket)
+            ).all()
+        )
+        histogram = [
+            {
+                "min": low + index * width,
+                "max": low + (index + 1) * width,
+                "count": counts.get(index, 0),
+            }
+            for index in range(buckets if high > low else 1)
+        ]
+    return {
+        "categories": [
+            {"category": category, "count": count} for category, count in categories
+        ],
+        "price": {"min": low, "max": high, "histogram": histogram},
+    }
+
+
+def parse_product_filters(args: dict) -> list:
+    """
+    Translate the filters of the product list query string into SQL conditions.
+
+    Args:
+        args (dict): The query parameters of the request.
+
+    Returns:
+        list: The SQLAlchemy conditions to apply on the 'products' table.
+
+    Raises:
+        ValueError: If a filter value is invalid.
+    """
+    return parse_category_filter(args) + parse_price_filters(args)
+
+
+def parse_category_filter(args: dict) -> list:
+    """
+    Translate the 'category' query parameter into SQL conditions.
+
+    Args:
+        args (dict): The query parameters of the request.
+
+    Returns:
+        list: The condition on the category, if the parameter is set.
+    """
+    if "category" in args:
+        return [Product.category == args["category"]]
+    return []
+
+
+def parse_price_filters(args: dict) -> list:
+    """
+    Translate the 'min_price' and 'max_price' query parameters into SQL conditions.
+
+    Args:
+        args (dict): The query parameters of the request.
+
+    Returns:
+        list: The conditions on the price, for the parameters set.
+
+    Raises:
+        ValueError: If a price is not a finite number.
+    """
+    filters = []
+    try:
+        if "min_price" in args:
+            filters.append(Product.price >= parse_finite(args["min_price"]))
+        if "max_price" in args:
+            filters.append(Product.price <= parse_finite(args["max_price"]))
+    except ValueError:
+        raise ValueError(
+            "Parameters min_price and max_price must be numbers."
+        ) from None
+    return filters
+
+
+def parse_finite(value: str) -> float:
+    """
+    Parse a finite number ('nan' and 'inf' are rejected).
+
+    Raises:
+        ValueError: If the value is not a finite number.
+    """
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value} is not a finite number.")
+    return number
+
+
+@products_print.route("/products/search", methods=["GET"])
+@catalog_conditional
+def search_products() -> jsonify:
+    """
+    Search the products by name, description and category.
+
+    The search is served by the 'products_fts' full-text index and the products
+    are ranked by relevance (BM25, a match on the name weighing the most). The
+    pages follow a keyset on (rank, id), so a deep page does not sort again the
+    matches of the previous pages. The BM25 rank of a product depends on the
+    whole catalog: a product write between two pages may repeat or skip
+    products in the next one. Every match is still ranked, so a word matching
+    most of the catalog stays costly: words shorter than SEARCH_MIN_TERM_LENGTH
+    are ignored.
+
+    Query parameters:
+        q (str): The words to search, each one matched as a prefix.
+        limit (int): Maximum number of products returned (default 50).
+        cursor (str): The 'next' value of the previous page.
+        fields (str): Comma separated list of fields to return (default 'id,name').
+
+    Returns:
+        Response: A JSON response containing the matching products of the page and
+                  the 'next' cursor (null on the last page),
+                  or an error message with status code 400 if a parameter is invalid.
+    """
+    try:
+        query = build_search_query(request.args.get("q", ""))
+        if not query:
+            raise ValueError(
+                f"Parameter q is required, with words of {SEARCH_MIN_TERM_LENGTH}"
+                " characters or more."
+            )
+        limit = parse_limit(request.args.get("limit"))
+        fields = parse_fields(
+            request.args.get("fields"), PRODUCT_LIST_FIELDS, ["id", "name"]
+        )
+        keys = [PRODUCT_SEARCH_RANK, Product.id]
+        filters = [text("products_fts MATCH :query").bindparams(query=query)]
+        cursor = request.args.get("cursor")
+        if cursor:
+            filters.append(
+                keyset_condition(keys, decode_cursor(cursor, ((int, float), int)))
+            )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    session = get_session()
+    stmt = (
+        select(
+            *[Product.__table__.c[field] for field in fields],
+            PRODUCT_SEARCH_RANK.label("search_rank"),
+            *([] if "id" in fields else [Product.id]),
+        )
+        .select_from(products_fts)
+        .join(Product.__table__, Product.id == products_fts.c.rowid)
+        .where(*filters)
+        .order_by(*keys)
+        .limit(limit + 1)
+    )
+    products = session.execute(stmt).all()
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = encode_cursor([products[-1].search_rank, products[-1].id])
+    return jsonify(
+        {
+            "products": PRODUCT_SERIALIZER.dump_many(products, fields),
+            "next": next_cursor,
+        }
+    )
+
+
+def build_search_query(terms: str) -> str:
     """
-    Retrieve a summary list of all products.
+    Turn free text into an FTS5 query matching every word as a prefix.
+
+    Words are quoted, so FTS5 operators typed by the client are searched as text.
+    Words shorter than SEARCH_MIN_TERM_LENGTH are left out.
+
+    Args:
+        terms (str): The text typed by the client.
 
     Returns:
-        Response: A JSON response containing a list of products,
-                  each with its id and name.
+        str: The FTS5 query, empty if the text holds no word long enough.
     """
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
-    products = session.query(Product).with_entities(Product.id, Product.name).all()
-    result = [{"id": prod.id, "name": prod.name} for prod in products]
-    return jsonify(result)
+    return " ".join(
+        f'"{word}"*'
+        for word in re.findall(r"\w+", terms)
+        if len(word) >= SEARCH_MIN_TERM_LENGTH
+    )
 
 
 @products_print.route("/product", methods=["POST"])
@@ -79,12 +453,7 @@ def create_product() -> jsonify:
     if len(missing_fields) > 0:
         return jsonify({"error": f"Missing fields : {missing_fields}"}), 400
 
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
     try:
         product = Product(
             name=data["name"],
@@ -95,26 +464,58 @@ def create_product() -> jsonify:
             date_creation=datetime.now(),
         )
         session.add(product)
+        bump_catalog_version(session)
         session.commit()
     except Exception as e:
         session.rollback()
         return jsonify({"error": f"Internal error: {str(e)}"}), 500
+    current_app.product_cache.invalidate(product.id)
 
     return (
-        jsonify(
-            {
-                "id": product.id,
-                "name": product.name,
-                "description": product.description,
-                "category": product.category,
-                "price": product.price,
-                "stock": product.stock,
-            }
-        ),
+        jsonify(PRODUCT_SERIALIZER.dump(product)),
         201,
     )
 
 
+@products_print.route("/products/bulk", methods=["POST"])
+@user_required(pass_user=False, needed_admin=True)
+def bulk_import_products() -> jsonify:
+    """
+    Create or update products in bulk from a streamed NDJSON or CSV body.
+
+    Requires admin privileges.
+
+    The body is read line by line and upserted on the product name in chunks of
+    PRODUCT_BULK_CHUNK_SIZE rows (one executemany and one commit per chunk),
+    so memory use does not depend on the size of the upload.
+
+    Expects:
+        'Content-Type: application/x-ndjson' with one JSON product per line, or
+        'Content-Type: text/csv' with a header row, each product having the fields
+        'name', 'description', 'category', 'price' and optionally 'stock'.
+
+    Returns:
+        Response: A JSON response with the import report (rows read, imported and
+                  rejected, per-row errors, throughput), or an error message with
+                  status code 415 if the content type is not supported.
+    """
+    fmt = BULK_FORMATS.get(request.mimetype)
+    if fmt is None:
+        return (
+            jsonify({"error": f"Content-Type must be one of {list(BULK_FORMATS)}."}),
+            415,
+        )
+
+    report = import_products(
+        get_session(),
+        read_records(request.stream, fmt),
+        PRODUCT_FIELD,
+        PRODUCT_BULK_CHUNK_SIZE,
+    )
+    current_app.product_cache.clear()
+    return jsonify(report), 200
+
+
 @products_print.route("/product/<int:product_id>", methods=["PUT"])
 @user_required(pass_user=False, needed_admin=True)
 def update_product(product_id: int) -> jsonify:
@@ -132,12 +533,7 @@ def update_product(product_id: int) -> jsonify:
     """
 
     data = request.get_json()
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
 
     product = session.query(Product).filter_by(id=product_id).first()
 
@@ -148,18 +544,11 @@ def update_product(product_id: int) -> jsonify:
         if column in Product.__table__.columns:
             setattr(product, column, data[column])
 
+    bump_catalog_version(session)
     session.commit()
+    current_app.product_cache.invalidate(product_id)
 
-    return jsonify(
-        {
-            "id": product.id,
-            "name": product.name,
-            "description": product.description,
-            "category": product.category,
-            "price": product.price,
-            "stock": product.stock,
-        }
-    )
+    return jsonify(PRODUCT_SERIALIZER.dump(product))
 
 
 @products_print.route("/product/<int:product_id>", methods=["DELETE"])
@@ -174,22 +563,25 @@ def delete_product(product_id: int) -> jsonify:
         product_id (int): The unique identifier of the product to delete.
 
     Returns:
-        Response: A JSON response confirming deletion if found,
-                  or an error message with status code 404 if not found.
+        Response: A JSON response confirming deletion if found, or an error
+                  message with status code 404 if not found, or 409 if the
+                  product is part of commands.
     """
-    session = getattr(g, "db_session", None)
-    if session is None:
-        session_factory = getattr(current_app, "session_factory", None)
-        if session_factory is None:
-            return jsonify({"error": "Session factory not set"}), 500
-        session = session_factory()
+    session = get_session()
 
     product = session.query(Product).filter_by(id=product_id).first()
     if not product:
         return jsonify({"error": "Product not found."}), 404
 
-    session.delete(product)
-    session.commit()
+    try:
+        session.delete(product)
+        bump_catalog_version(session)
+        session.commit()
+    except IntegrityError:
+        # The foreign keys of SQLite are enforced: the product is ordered.
+        session.rollback()
+        return jsonify({"error": "Product is part of commands."}), 409
+    current_app.product_cache.invalidate(product_id)
     return (
         jsonify(
             {"message": f"Product {product.name} with ID = {product_id} was deleted."}
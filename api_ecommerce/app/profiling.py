@@ -0,0 +1,66 @@
+import cProfile
+import os
+import time
+from typing import Callable
+from flask import Response, make_response, request
+from api_ecommerce.config import PROFILE_DIR, PROFILE_KEEP
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_FILE_HEADER = "X-Profile-File"
+
+
+def profile_requested() -> bool:
+    """
+    Tell whether the client asked to profile the current request.
+    """
+    return request.headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes")
+
+
+def prune_profiles(directory: str, keep: int) -> None:
+    """
+    Delete the oldest profiles of a directory, keeping the 'keep' newest.
+    """
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".prof")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in profiles[: max(len(profiles) - keep, 0)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:  # Pruned by another request.
+            pass
+
+
+def profile_call(func: Callable, *args, **kwargs) -> Response:
+    """
+    Run a route handler under cProfile and store its profile.
+
+    The profile is written to PROFILE_DIR as '<endpoint>-<time>.prof', readable
+    with pstats or snakeviz, and its name returned in the X-Profile-File header.
+    Only the handler is profiled: the body of a streamed response is produced
+    after the handler returns, outside the profile. If another profiler already
+    runs in the thread, the handler runs without profiling.
+
+    Args:
+        func (Callable): The route handler.
+        *args: Its positional arguments.
+        **kwargs: Its keyword arguments.
+
+    Returns:
+        Response: The response of the handler.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return make_response(func(*args, **kwargs))
+    try:
+        response = make_response(func(*args, **kwargs))
+    finally:
+        profiler.disable()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{request.endpoint}-{time.time_ns()}.prof"
+    profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+    prune_profiles(PROFILE_DIR, PROFILE_KEEP)
+    response.headers[PROFILE_FILE_HEADER] = name
+    return response
@@ -0,0 +1,83 @@
+from operator import attrgetter, itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class Serializer:
+    """
+    Convert the rows of a model to JSON-ready dicts.
+
+    A row is anything exposing the fields as attributes: an ORM instance or a
+    SQLAlchemy Row of a Core select, so listings can skip building ORM objects.
+    The getter of each field selection is built once and reused; the fields of
+    Rows are read by position, which is much faster than by name.
+
+    Args:
+        fields (list): The fields serialized by default, in order.
+        keys (dict, optional): The output key of the fields renamed in the JSON.
+    """
+
+    def __init__(self, fields: Sequence[str], keys: Optional[Dict[str, str]] = None):
+        self.fields = tuple(fields)
+        self.keys = keys or {}
+        self._getters: Dict[tuple, Tuple[Tuple[str, ...], Callable]] = {}
+
+    def _getter(
+        self, fields: Tuple[str, ...], row: object
+    ) -> Tuple[Tuple[str, ...], Callable]:
+        columns = getattr(row, "_fields", None)
+        getter = self._getters.get((fields, columns))
+        if getter is None:
+            if columns is None:
+                get = attrgetter(*fields)
+            else:
+                get = itemgetter(*[columns.index(field) for field in fields])
+            if len(fields) == 1:
+                get = lambda row, get=get: (get(row),)
+            keys = tuple(self.keys.get(field, field) for field in fields)
+            getter = self._getters[fields, columns] = (keys, get)
+        return getter
+
+    def dump(self, row: object, fields: Optional[Sequence[str]] = None) -> dict:
+        """
+        Serialize one row.
+
+        Args:
+            row (object): The row to serialize.
+            fields (list, optional): The fields to serialize (default: all of them).
+
+        Returns:
+            dict: The serialized row.
+        """
+        keys, get = self._getter(tuple(fields or self.fields), row)
+        return dict(zip(keys, get(row)))
+
+    def dump_many(
+        self, rows: Iterable[object], fields: Optional[Sequence[str]] = None
+    ) -> List[dict]:
+        """
+        Serialize rows of the same kind (all ORM instances or all Rows of one select).
+
+        Args:
+            rows (Iterable): The rows to serialize.
+            fields (list, optional): The fields to serialize (default: all of them).
+
+        Returns:
+            list: The serialized rows.
+        """
+        rows = list(rows)
+        if not rows:
+            return []
+        keys, get = self._getter(tuple(fields or self.fields), rows[0])
+        return [dict(zip(keys, get(row))) for row in rows]
+
+
+PRODUCT_SERIALIZER = Serializer(
+    ["id", "name", "description", "category", "price", "stock"]
+)
+COMMAND_SERIALIZER = Serializer(["id", "status", "address_delivery", "date_command"])
+COMMAND_LIST_SERIALIZER = Serializer(
+    ["id", "status", "address_delivery", "date_command"], keys={"id": "command_id"}
+)
+COMMAND_LIGN_SERIALIZER = Serializer(
+    ["product_id", "name", "quantity", "price"], keys={"product_id": "id"}
+)
@@ -8,12 +8,32 @@ from sqlalchemy import (
     CheckConstraint,
     ForeignKey,
     Engine,
+    Index,
+    event,
+    inspect,
+    text,
 )
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import declarative_base
+import os
+from functools import partial
+from urllib.parse import quote
 from typing import Tuple, Optional
+from api_ecommerce.config import (
+    DATABASE_DIR,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    SQLITE_PRAGMAS,
+)
+from api_ecommerce.slow_queries import init_slow_query_log
 
 Base = declarative_base()
 
+COMMAND_STATUS = ["on hold", "validated", "canceled", "shipped"]
+
 
 class Product(Base):
     """
@@ -27,6 +47,12 @@ class Product(Base):
         price (float): Unit price of the product.
         stock (int): Quantity of product in stock.
         date_creation (datetime): Date the product was created.
+
+    Indexes:
+        - (category, id) backs the product list restricted to a category
+          and the product count per category.
+        - (category, price, id) and (price, id) back the price filters and sorts,
+          and the price histogram.
     """
 
     __tablename__ = "products"
@@ -39,6 +65,12 @@ class Product(Base):
     stock = Column(Integer, default=0)
     date_creation = Column(DATETIME)
 
+    __table_args__ = (
+        Index("ix_products_category_id", "category", "id"),
+        Index("ix_products_category_price_id", "category", "price", "id"),
+        Index("ix_products_price_id", "price", "id"),
+    )
+
 
 class User(Base):
     """
@@ -81,6 +113,10 @@ class Command(Base):
 
     Constraints:
         - 'status' must be 'on hold', 'validated', 'canceled', or 'shipped'.
+
+    Indexes:
+        - (user_id, id), (status, id) and (date_command, id) back the keyset
+          pagination of the order list filtered by user, status or date.
     """
 
     __tablename__ = "commands"
@@ -92,10 +128,10 @@ class Command(Base):
     date_command = Column(DATETIME)
 
     __table_args__ = (
-        CheckConstraint(
-            status.in_(["on hold", "validated", "canceled", "shipped"]),
-            name="check_status",
-        ),
+        CheckConstraint(status.in_(COMMAND_STATUS), name="check_status"),
+        Index("ix_commands_user_id_id", "user_id", "id"),
+        Index("ix_commands_status_id", "status", "id"),
+        Index("ix_commands_date_command_id", "date_command", "id"),
     )
 
 
@@ -109,6 +145,10 @@ class CommandLign(Base):
         command_id (int): Foreign key referencing the order.
         quantity (int): Quantity of the product in the order.
         price (int): Price of the product at the time of ordering.
+
+    Indexes:
+        - (command_id, product_id) backs the lines of a command joined to their products.
+        - (product_id) backs the lookup of the orders of a product.
     """
 
     __tablename__ = "commands_lign"
@@ -119,19 +159,240 @@ class CommandLign(Base):
     quantity = Column(Integer, nullable=False, default=0)
     price = Column(Integer, nullable=False, default=0)
 
+    __table_args__ = (
+        Index("ix_commands_lign_command_id_product_id", "command_id", "product_id"),
+        Index("ix_commands_lign_product_id", "product_id"),
+    )
+
+
+class CatalogVersion(Base):
+    """
+    SQLAlchemy ORM model of the catalog change counter.
+
+    The single row (id 1) is incremented in the transaction of every change to
+    the products, so it identifies a state of the catalog (see the ETags of the
+    product routes). The row is created by the first increment.
+
+    Attributes:
+        id (int): Always 1.
+        version (int): Number of catalog changes.
+    """
+
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+PRODUCT_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category, content='products', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF name, description, category ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category)
+        VALUES ('delete', old.id, old.name, old.description, old.category);
+        INSERT INTO products_fts(rowid, name, description, category)
+        VALUES (new.id, new.name, new.description, new.category);
+    END
+    """,
+]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_product_search(target, connection, **kw) -> None:
+    """
+    Create the SQLite FTS5 index of the products (name, description, category).
+
+    The 'products_fts' external content table is kept in sync with 'products'
+    by triggers. It is filled from the existing products when it is created,
+    so running create_all on an existing database also migrates it.
+
+    Args:
+        target (MetaData): The metadata being created.
+        connection (Connection): The connection running create_all.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = inspect(connection).has_table("products_fts")
+    for statement in PRODUCT_SEARCH_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        connection.execute(
+            text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+        )
+
 
-def build_engine(filename: str) -> Tuple[Engine, Optional[bool]]:
+def database_url(database: str) -> URL:
     """
-    Create a SQLAlchemy engine instance connected to a SQLite database file,
-    and initialize the database schema.
+    Resolve the database setting of the application into an engine URL.
 
     Args:
-        filename (str): The name of the SQLite database file (without extension).
+        database (str): A full database URL, or the name of a SQLite database
+                        file of DATABASE_DIR (without extension).
+
+    Returns:
+        URL: The URL of the database.
+    """
+    if "://" in database:
+        return make_url(database)
+    return make_url(f"sqlite:///{os.path.join(DATABASE_DIR, database)}.db")
+
+
+def is_memory_database(url: URL) -> bool:
+    """
+    Tell whether a URL points to an in-memory SQLite database, which has no
+    connection pool to size (a single connection is shared).
+    """
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:")
+        or url.query.get("mode") == "memory"
+        or url.database.startswith("file::memory:")
+    )
+
+
+def engine_options(url: URL) -> dict:
+    """
+    Return the connection pool options of the settings for an engine URL.
+
+    Args:
+        url (URL): The URL of the engine.
+
+    Returns:
+        dict: The keyword arguments of create_engine.
+    """
+    if is_memory_database(url):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def set_sqlite_pragmas(pragmas: dict, dbapi_connection, connection_record) -> None:
+    """
+    Apply SQLite pragmas to a new connection.
+
+    Args:
+        pragmas (dict): The pragmas and their values (see SQLITE_PRAGMAS).
+        dbapi_connection: The DBAPI connection just opened.
+        connection_record: Its record in the pool.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def init_engine(engine: Engine) -> None:
+    """
+    Hook the connection settings and the slow query log to an engine.
+
+    Args:
+        engine (Engine): The engine (the 'sync_engine' of an AsyncEngine).
+    """
+    if engine.dialect.name == "sqlite":
+        pragmas = SQLITE_PRAGMAS
+        if engine.url.query.get("mode") == "ro":
+            # The journal mode is stored in the file, set by the primary engine.
+            pragmas = {k: v for k, v in pragmas.items() if k != "journal_mode"}
+        event.listen(engine, "connect", partial(set_sqlite_pragmas, pragmas))
+    init_slow_query_log(engine)
+
+
+def build_engine(database: str) -> Tuple[Engine, Optional[bool]]:
+    """
+    Create a SQLAlchemy engine instance connected to a database, and initialize
+    the database schema.
+
+    The pool is sized by the DB_POOL_* settings and every SQLite connection is
+    tuned by the SQLITE_PRAGMAS settings (WAL journal, so readers do not wait
+    for the writer). The statements slower than the SLOW_QUERY_THRESHOLD
+    setting are logged (see slow_queries).
+
+    Args:
+        database (str): A full database URL, or the name of a SQLite database
+                        file of DATABASE_DIR (without extension).
 
     Returns:
         tuple: A tuple containing:
-            - engine_instance: The SQLAlchemy engine connected to the SQLite database.
+            - engine_instance: The SQLAlchemy engine connected to the database.
             - result: The result of Base.metadata.create_all(engine_instance).
     """
-    engine_instance = create_engine(f"sqlite:///data/db_data/{filename}.db")
+    url = database_url(database)
+    engine_instance = create_engine(url, **engine_options(url))
+    init_engine(engine_instance)
     return engine_instance, Base.metadata.create_all(engine_instance)
+
+
+def build_read_engine(engine: Engine, url: Optional[str] = None) -> Engine:
+    """
+    Create the engine of the read-only routes, next to the primary engine.
+
+    - With 'url' (a replica of the primary database), an engine on it.
+    - For a SQLite file, an engine opening it read-only (URI 'mode=ro'): in
+      WAL mode, its readers do not wait for the writes of the primary engine.
+    - Otherwise the primary engine itself.
+
+    Args:
+        engine (Engine): The primary engine, built by build_engine.
+        url (str, optional): The URL of a read replica.
+
+    Returns:
+        Engine: The engine to read from.
+    """
+    if url:
+        read_url = make_url(url)
+    elif engine.dialect.name == "sqlite" and not is_memory_database(engine.url):
+        read_url = URL.create(
+            "sqlite",
+            database=f"file:{quote(engine.url.database)}",
+            query={"mode": "ro", "uri": "true"},
+        )
+    else:
+        return engine
+    read_engine = create_engine(read_url, **engine_options(read_url))
+    init_engine(read_engine)
+    return read_engine
+
+
+def build_async_engine(engine: Engine) -> AsyncEngine:
+    """
+    Create an asyncio engine connected to the database of a synchronous engine,
+    through the aiosqlite driver (optional dependency 'async'), with the same
+    pool and SQLite settings.
+
+    Args:
+        engine (Engine): An engine built by build_engine, whose schema is initialized.
+
+    Returns:
+        AsyncEngine: The asyncio engine connected to the same database.
+
+    Raises:
+        ValueError: If the database is not a SQLite database.
+    """
+    if engine.dialect.name != "sqlite":
+        raise ValueError("The asynchronous mode only supports SQLite databases.")
+    url = engine.url.set(drivername="sqlite+aiosqlite")
+    async_engine = create_async_engine(url, **engine_options(url))
+    init_engine(async_engine.sync_engine)
+    return async_engine
@@ -0,0 +1,12 @@
+from api_ecommerce.app.asgi import create_async_app
+from api_ecommerce.config import SECRET_KEY
+
+app = create_async_app()
+
+app.app.config["SECRET_KEY"] = SECRET_KEY
+
+if __name__ == "__main__":
+    # Only needed to serve from this script (extra 'async').
+    import uvicorn
+
+    uvicorn.run(app)
@@ -0,0 +1,643 @@
+import argparse
+import datetime
+import json
+import math
+import platform
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import Engine, func, select
+from api_ecommerce.models import User, Product, Command, build_engine
+from api_ecommerce.scripts.generate_database import (
+    GENERATED_PASSWORD,
+    GENERATED_WORDS,
+)
+
+BENCHMARK_DIRECTORY = Path("data/benchmarks")
+BENCHMARK_SCENARIOS = {}
+
+Sender = Callable[[dict, dict], Tuple[int, Optional[dict]]]
+
+
+def scenario(name: str) -> Callable:
+    """
+    Register a benchmark scenario in BENCHMARK_SCENARIOS.
+
+    A scenario is a function called before each measured request with the shared
+    context, a seeded random generator and the sender of the worker. It returns
+    the request to measure: 'method', 'path', 'auth' ('admin', 'user' or None)
+    and optionally 'json', or 'data' and 'content_type'. It may send untimed
+    setup requests, e.g. to create the product it deletes.
+
+    Args:
+        name (str): Name of the scenario in the results.
+    """
+
+    def register(build: Callable) -> Callable:
+        BENCHMARK_SCENARIOS[name] = build
+        return build
+
+    return register
+
+
+def new_product(rng: random.Random) -> dict:
+    return {
+        "name": f"Benchmark {uuid.uuid4().hex}",
+        "description": " ".join(rng.sample(GENERATED_WORDS, 4)),
+        "category": "Benchmark",
+        "price": round(rng.uniform(1, 500), 2),
+        "stock": 1000,
+    }
+
+
+@scenario("auth.login")
+def login_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    email, password = ctx["credentials"]["user"]
+    return {
+        "method": "POST",
+        "path": "/api/auth/login",
+        "json": {"email": email, "password": password},
+    }
+
+
+@scenario("auth.register")
+def register_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    return {
+        "method": "POST",
+        "path": "/api/auth/register",
+        "json": {
+            "email": f"benchmark-{uuid.uuid4().hex}@example.com",
+            "password": GENERATED_PASSWORD,
+        },
+    }
+
+
+@scenario("auth.get_hash_pool_stats")
+def hash_pool_stats_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    return {"method": "GET", "path": "/api/auth/hash-pool", "auth": "admin"}
+
+
+@scenario("products.get_product")
+def get_product_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    product_id = rng.randint(1, ctx["max_product"])
+    return {"method": "GET", "path": f"/api/product/{product_id}"}
+
+
+@scenario("products.get_products")
+def get_products_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    path = rng.choice(
+        [
+            "/api/products",
+            "/api/products?sort=-price&limit=100",
+            "/api/products?"
+            + urllib.parse.urlencode(
+                {"category": rng.choice(ctx["categories"]), "min_price": 10}
+            ),
+            "/api/products?fields=name,price&max_price=50&sort=name",
+        ]
+    )
+    return {"method": "GET", "path": path}
+
+
+@scenario("products.get_product_facets")
+def get_facets_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    path = rng.choice(
+        [
+            "/api/products/facets",
+            "/api/products/facets?"
+            + urllib.parse.urlencode({"category": rng.choice(ctx["categories"])}),
+            "/api/products/facets?min_price=10&max_price=100&buckets=20",
+        ]
+    )
+    return {"method": "GET", "path": path}
+
+
+@scenario("products.search_products")
+def search_products_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    words = " ".join(rng.sample(GENERATED_WORDS, rng.randint(1, 2)))
+    return {
+        "method": "GET",
+        "path": "/api/products/search?" + urllib.parse.urlencode({"q": words}),
+    }
+
+
+@scenario("products.get_product_cache_stats")
+def cache_stats_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    return {"method": "GET", "path": "/api/products/cache", "auth": "admin"}
+
+
+@scenario("products.create_product")
+def create_product_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    return {
+        "method": "POST",
+        "path": "/api/product",
+        "auth": "admin",
+        "json": new_product(rng),
+    }
+
+
+@scenario("products.bulk_import_products")
+def bulk_import_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    lines = (json.dumps(new_product(rng)) for _ in range(100))
+    return {
+        "method": "POST",
+        "path": "/api/products/bulk",
+        "auth": "admin",
+        "data": "\n".join(lines).encode(),
+        "content_type": "application/x-ndjson",
+    }
+
+
+@scenario("products.update_product")
+def update_product_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    product_id = rng.randint(1, ctx["max_product"])
+    return {
+        "method": "PUT",
+        "path": f"/api/product/{product_id}",
+        "auth": "admin",
+        "json": {"stock": rng.randint(100, 1000)},
+    }
+
+
+@scenario("products.delete_product")
+def delete_product_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    _, product = send(create_product_request(ctx, rng, send), ctx["tokens"])
+    return {
+        "method": "DELETE",
+        "path": f"/api/product/{product['id']}",
+        "auth": "admin",
+    }
+
+
+@scenario("commands.list_commands")
+def list_commands_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    path = rng.choice(
+        [
+            "/api/commands",
+            "/api/commands?status=validated&limit=100",
+            "/api/commands?date_from=2023-01-01&date_to=2023-02-01",
+        ]
+    )
+    return {"method": "GET", "path": path, "auth": rng.choice(["admin", "user"])}
+
+
+@scenario("commands.get_command")
+def get_command_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    command_id = rng.randint(1, ctx["max_command"])
+    return {"method": "GET", "path": f"/api/command/{command_id}", "auth": "admin"}
+
+
+@scenario("commands.get_command_lign")
+def get_command_lign_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    command_id = rng.randint(1, ctx["max_command"])
+    return {
+        "method": "GET",
+        "path": f"/api/command/{command_id}/lign",
+        "auth": "admin",
+    }
+
+
+@scenario("commands.create_command")
+def create_command_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    product_ids = [rng.randint(1, ctx["max_product"]) for _ in range(rng.randint(1, 5))]
+    return {
+        "method": "POST",
+        "path": "/api/command/",
+        "auth": "user",
+        "json": {"product_id": product_ids, "address_delivery": "1 rue du Test"},
+    }
+
+
+@scenario("commands.update_command_status")
+def update_command_status_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    command_id = rng.randint(1, ctx["max_command"])
+    return {
+        "method": "PATCH",
+        "path": f"/api/command/{command_id}",
+        "auth": "admin",
+        "json": {"status": rng.choice(["validated", "shipped"])},
+    }
+
+
+@scenario("exports.export_table")
+def export_table_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    table = rng.choice(["products", "commands", "commands_lign"])
+    fmt = rng.choice(["ndjson", "csv"])
+    return {
+        "method": "GET",
+        "path": f"/api/export/{table}?format={fmt}",
+        "auth": "admin",
+    }
+
+
+@scenario("metrics.get_metrics")
+def metrics_request(ctx: dict, rng: random.Random, send: Sender) -> dict:
+    return {"method": "GET", "path": "/metrics"}
+
+
+def client_sender(client) -> Sender:
+    """
+    Build a sender going through a Flask test client.
+
+    Args:
+        client (FlaskClient): The test client of the application.
+
+    Returns:
+        Callable: A function sending a request with the given tokens and returning
+                  its status code and decoded JSON body.
+    """
+
+    def send(request: dict, tokens: dict) -> Tuple[int, Optional[dict]]:
+        headers = {}
+        if request.get("auth"):
+            headers["Authorization"] = f"Bearer {tokens[request['auth']]}"
+        response = client.open(
+            request["path"],
+            method=request["method"],
+            headers=headers,
+            json=request.get("json"),
+            data=request.get("data"),
+            content_type=request.get("content_type"),
+        )
+        return response.status_code, response.get_json(silent=True)
+
+    return send
+
+
+def http_sender(base_url: str) -> Sender:
+    """
+    Build a sender going through HTTP to a running server.
+
+    Args:
+        base_url (str): The URL of the server, e.g. 'http://127.0.0.1:5000'.
+
+    Returns:
+        Callable: A function sending a request with the given tokens and returning
+                  its status code and decoded JSON body.
+    """
+
+    def send(request: dict, tokens: dict) -> Tuple[int, Optional[dict]]:
+        headers = {}
+        data = request.get("data")
+        if request.get("auth"):
+            headers["Authorization"] = f"Bearer {tokens[request['auth']]}"
+        if request.get("json") is not None:
+            data = json.dumps(request["json"]).encode()
+            headers["Content-Type"] = "application/json"
+        elif request.get("content_type"):
+            headers["Content-Type"] = request["content_type"]
+        http_request = urllib.request.Request(
+            base_url.rstrip("/") + request["path"],
+            data=data,
+            headers=headers,
+            method=request["method"],
+        )
+        try:
+            with urllib.request.urlopen(http_request) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        try:
+            return status, json.loads(body)
+        except ValueError:
+            return status, None
+
+    return send
+
+
+def benchmark_context(engine: Engine, credentials: Optional[dict] = None) -> dict:
+    """
+    Read from the database what the scenarios need to build their requests.
+
+    Args:
+        engine (Engine): The engine connected to the benchmarked database.
+        credentials (dict, optional): The ('email', 'password') of an 'admin' and
+                                      a 'user'. By default, the first admin and the
+                                      first user of the database, with the password
+                                      of the generated users.
+
+    Returns:
+        dict: The context shared by the scenarios.
+    """
+    with engine.connect() as connection:
+        if credentials is None:
+            credentials = {
+                role: (
+                    connection.scalar(
+                        select(User.email)
+                        .where(User.role == role)
+                        .order_by(User.id)
+                        .limit(1)
+                    ),
+                    GENERATED_PASSWORD,
+                )
+                for role in ("admin", "user")
+            }
+        categories = connection.scalars(
+            select(Product.category).distinct().limit(20)
+        ).all()
+        return {
+            "credentials": credentials,
+            "max_product": connection.scalar(select(func.max(Product.id))) or 1,
+            "max_command": connection.scalar(select(func.max(Command.id))) or 1,
+            "categories": categories or ["Benchmark"],
+        }
+
+
+def login_tokens(send: Sender, credentials: dict) -> dict:
+    """
+    Log in the benchmark accounts.
+
+    Args:
+        send (Callable): The sender used for the benchmark.
+        credentials (dict): The ('email', 'password') of each role.
+
+    Returns:
+        dict: The JWT token of each role.
+
+    Raises:
+        RuntimeError: If an account cannot log in.
+    """
+    tokens = {}
+    for role, (email, password) in credentials.items():
+        request = {
+            "method": "POST",
+            "path": "/api/auth/login",
+            "json": {"email": email, "password": password},
+        }
+        status, body = send(request, {})
+        if status != 200:
+            raise RuntimeError(f"Cannot log in {role} {email} : {body}")
+        tokens[role] = body["token"]
+    return tokens
+
+
+def percentile(values: List[float], rank: float) -> float:
+    """
+    Return the nearest-rank percentile of sorted values.
+
+    Args:
+        values (list): The sorted values.
+        rank (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The smallest value greater than or equal to 'rank' percent of the values.
+    """
+    return values[max(math.ceil(rank / 100 * len(values)) - 1, 0)]
+
+
+def run_scenario(
+    name: str,
+    make_sender: Callable[[], Sender],
+    ctx: dict,
+    requests: int,
+    concurrency: int = 1,
+    warmup: int = 0,
+    seed: int = 0,
+) -> dict:
+    """
+    Measure the latency and throughput of one scenario.
+
+    The requests are shared among 'concurrency' threads, each with its own sender
+    and a random generator seeded from 'seed'. Only the measured request of each
+    iteration is timed, not the building of the request.
+
+    Args:
+        name (str): Name of the scenario in BENCHMARK_SCENARIOS.
+        make_sender (Callable): Builds the sender of a thread.
+        ctx (dict): The context built by benchmark_context, with the tokens.
+        requests (int): Number of measured requests.
+        concurrency (int): Number of threads sending requests.
+        warmup (int): Number of requests sent per thread before measuring.
+        seed (int): Seed of the random generators.
+
+    Returns:
+        dict: The number of requests, the count of each status code, the p50, p95,
+              p99, mean and max latencies in milliseconds and the requests per second.
+    """
+    build = BENCHMARK_SCENARIOS[name]
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index: int, count: int) -> None:
+        send = make_sender()
+        rng = random.Random(f"{seed}-{name}-{index}")
+        for _ in range(warmup):
+            send(build(ctx, rng, send), ctx["tokens"])
+        start_barrier.wait()
+        measured = []
+        for _ in range(count):
+            request = build(ctx, rng, send)
+            start = time.perf_counter()
+            status, _ = send(request, ctx["tokens"])
+            measured.append((time.perf_counter() - start, status))
+        with lock:
+            latencies.extend(latency for latency, _ in measured)
+            statuses.update(str(status) for _, status in measured)
+
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(i, requests // concurrency + (i < requests % concurrency)),
+        )
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    milliseconds = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "statuses": dict(sorted(statuses.items())),
+        "p50_ms": milliseconds(percentile(latencies, 50)),
+        "p95_ms": milliseconds(percentile(latencies, 95)),
+        "p99_ms": milliseconds(percentile(latencies, 99)),
+        "mean_ms": milliseconds(sum(latencies) / len(latencies)),
+        "max_ms": milliseconds(latencies[-1]),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+    }
+
+
+def run_benchmark(
+    make_sender: Callable[[], Sender],
+    ctx: dict,
+    names: List[str],
+    requests: int,
+    concurrency: int = 1,
+    warmup: int = 0,
+    seed: int = 0,
+) -> Dict[str, dict]:
+    """
+    Log in the benchmark accounts, then run the scenarios one after the other.
+
+    Args:
+        make_sender (Callable): Builds the sender of a thread.
+        ctx (dict): The context built by benchmark_context.
+        names (list): Names of the scenarios to run.
+        requests (int): Number of measured requests per scenario.
+        concurrency (int): Number of threads sending requests.
+        warmup (int): Number of requests sent per thread before measuring.
+        seed (int): Seed of the random generators.
+
+    Returns:
+        dict: The results of each scenario, see run_scenario.
+    """
+    ctx["tokens"] = login_tokens(make_sender(), ctx["credentials"])
+    results = {}
+    for name in names:
+        results[name] = run_scenario(
+            name, make_sender, ctx, requests, concurrency, warmup, seed
+        )
+        print(format_result(name, results[name]))
+    return results
+
+
+def format_result(name: str, result: dict, previous: Optional[dict] = None) -> str:
+    """
+    Format the results of a scenario as one line, with the change of the p95
+    latency and of the throughput since a previous run if given.
+    """
+    line = (
+        f"{name:<34} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+        f"p99 {result['p99_ms']:>9.2f}ms  {result['requests_per_second']:>9.1f} req/s  "
+        f"{result['statuses']}"
+    )
+    if previous:
+        change = lambda key: (
+            (result[key] / previous[key] - 1) * 100 if previous[key] else 0
+        )
+        line += f"  (p95 {change('p95_ms'):+.1f}%, req/s {change('requests_per_second'):+.1f}%)"
+    return line
+
+
+def git_commit() -> Optional[str]:
+    """
+    Return the current git commit, or None outside a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_api():
+    """
+    Benchmark every route of the API and save the results to JSON.
+
+    Usage:
+        benchmark-api [DATABASE] [--url URL] [--requests N] [--concurrency N]
+                      [--warmup N] [--scenario NAME ...] [--output FILE]
+                      [--compare FILE]
+
+    By default the routes are called through the Flask test client on the
+    database 'data/db_data/<DATABASE>.db' (default: ecommerce_load, see generate-db).
+    With '--url', they are called through HTTP on a running server using this
+    database. The write scenarios modify the database: regenerate it to compare
+    runs on the same data.
+    """
+    parser = argparse.ArgumentParser(
+        description="Measure the latency and throughput of every route of the API."
+    )
+    parser.add_argument(
+        "database",
+        nargs="?",
+        default="ecommerce_load",
+        help="Database name without extension (default: ecommerce_load).",
+    )
+    parser.add_argument("--url", help="URL of a running server (default: test client).")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--scenario",
+        nargs="+",
+        choices=list(BENCHMARK_SCENARIOS),
+        default=list(BENCHMARK_SCENARIOS),
+        help="Scenarios to run (default: all).",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Results file (default: data/benchmarks/<date>-<commit>.json).",
+    )
+    parser.add_argument("--compare", type=Path, help="Results of a previous run.")
+    args = parser.parse_args()
+    if min(args.requests, args.concurrency) < 1 or args.warmup < 0:
+        parser.error("--requests and --concurrency must be >= 1, --warmup >= 0.")
+
+    engine = build_engine(args.database)[0]
+    ctx = benchmark_context(engine)
+    engine.dispose()
+    if args.url:
+        make_sender = lambda: http_sender(args.url)
+    else:
+        from api_ecommerce.app import create_app
+        from api_ecommerce.config import SECRET_KEY
+
+        app = create_app(args.database)
+        app.config["SECRET_KEY"] = SECRET_KEY
+        make_sender = lambda: client_sender(app.test_client())
+
+    results = run_benchmark(
+        make_sender,
+        ctx,
+        args.scenario,
+        args.requests,
+        args.concurrency,
+        args.warmup,
+        args.seed,
+    )
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "database": args.database,
+            "target": args.url or "test client",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    output = args.output or BENCHMARK_DIRECTORY / (
+        f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{commit or 'nocommit'}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"✅ Results saved to {output}")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text())["results"]
+        print(f"Compared to {args.compare} :")
+        for name, result in results.items():
+            print(format_result(name, result, previous.get(name)))
+
+
+if __name__ == "__main__":
+    benchmark_api()
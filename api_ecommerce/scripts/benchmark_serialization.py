@@ -0,0 +1,145 @@
+import argparse
+import time
+from typing import Callable, Dict, List, Sequence
+from flask import Flask
+from sqlalchemy import Engine, select
+from api_ecommerce.models import Product, Command, build_engine
+from api_ecommerce.app.json_provider import JSON_PROVIDERS, init_json_provider
+from api_ecommerce.app.serializers import (
+    Serializer,
+    PRODUCT_SERIALIZER,
+    COMMAND_LIST_SERIALIZER,
+)
+from api_ecommerce.scripts.benchmark import percentile
+
+SERIALIZATION_LISTINGS = {
+    "products": (PRODUCT_SERIALIZER, Product.__table__),
+    "commands": (COMMAND_LIST_SERIALIZER, Command.__table__),
+}
+
+
+def mapping_rows(serializer: Serializer, rows: Sequence) -> List[dict]:
+    """
+    Build the dicts of rows through their mapping, as the routes used to do.
+    """
+    keys = [(field, serializer.keys.get(field, field)) for field in serializer.fields]
+    return [{key: row._mapping[field] for field, key in keys} for row in rows]
+
+
+def read_listing(engine: Engine, listing: str, size: int) -> list:
+    """
+    Read the first rows of a listing, as the routes read them (Core rows).
+
+    Args:
+        engine (Engine): The engine connected to the database.
+        listing (str): Name of the listing, one of SERIALIZATION_LISTINGS.
+        size (int): Number of rows.
+
+    Returns:
+        list: The rows.
+    """
+    serializer, table = SERIALIZATION_LISTINGS[listing]
+    stmt = (
+        select(*[table.c[field] for field in serializer.fields])
+        .order_by(table.c.id)
+        .limit(size)
+    )
+    with engine.connect() as connection:
+        return connection.execute(stmt).all()
+
+
+def measure(function: Callable, repeat: int) -> Dict[str, float]:
+    """
+    Time a function several times.
+
+    Args:
+        function (Callable): The function to time, without arguments.
+        repeat (int): Number of calls.
+
+    Returns:
+        dict: The median and the 95th percentile of the calls, in milliseconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {"p50": percentile(durations, 50), "p95": percentile(durations, 95)}
+
+
+def benchmark_serialization(
+    rows: Sequence, serializer: Serializer, repeat: int
+) -> Dict[str, Dict[str, float]]:
+    """
+    Measure the serialization of a listing into a JSON response, for every way to
+    build its dicts (hand-built mappings or serializer) and every JSON provider.
+
+    Args:
+        rows (list): The rows of the listing.
+        serializer (Serializer): The serializer of the rows.
+        repeat (int): Number of measures of each combination.
+
+    Returns:
+        dict: The timings of each combination, keyed by '<builder>+<provider>'.
+    """
+    builders = {
+        "mapping": lambda: mapping_rows(serializer, rows),
+        "serializer": lambda: serializer.dump_many(rows),
+    }
+    results = {}
+    for name in JSON_PROVIDERS:
+        app = Flask(__name__)
+        init_json_provider(app, name)
+        provider = type(app.json).__name__
+        with app.app_context():
+            for builder, build in builders.items():
+                results[f"{builder}+{provider}"] = measure(
+                    lambda: app.json.response(build()), repeat
+                )
+    return results
+
+
+def benchmark_serializer():
+    """
+    Compare the serialization cost of large listings.
+
+    Usage:
+        benchmark-serialization [DATABASE] [--size N] [--repeat N]
+
+    The first '--size' products and commands of 'data/db_data/<DATABASE>.db'
+    (default: ecommerce_load, see generate-db) are serialized into a JSON response
+    with the hand-built dicts and the serializers, by the default JSON provider of
+    Flask and by orjson (when installed).
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare the serialization cost of large listings."
+    )
+    parser.add_argument(
+        "database",
+        nargs="?",
+        default="ecommerce_load",
+        help="Database name without extension (default: ecommerce_load).",
+    )
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    if min(args.size, args.repeat) < 1:
+        parser.error("--size and --repeat must be >= 1.")
+
+    engine = build_engine(args.database)[0]
+    for listing, (serializer, _) in SERIALIZATION_LISTINGS.items():
+        rows = read_listing(engine, listing, args.size)
+        results = benchmark_serialization(rows, serializer, args.repeat)
+        baseline = next(iter(results.values()))["p50"]
+        print(f"{listing} ({len(rows)} rows) :")
+        for name, result in results.items():
+            print(
+                f"  {name:<36} p50 {result['p50']:8.2f}ms  p95 {result['p95']:8.2f}ms"
+                f"  x{baseline / max(result['p50'], 1e-9):.2f}"
+            )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    benchmark_serializer()
@@ -1,28 +1,135 @@
+import argparse
 import datetime
+import time
+from contextlib import contextmanager
+from typing import Iterator
 import pandas
+from sqlalchemy import Engine, insert, text
 from sqlalchemy.orm import sessionmaker
-from api_ecommerce.models import User, Product, Command, CommandLign, build_engine
-from api_ecommerce.config import DATABASE_SQL
+from api_ecommerce.models import (
+    User,
+    Product,
+    Command,
+    CommandLign,
+    PRODUCT_SEARCH_DDL,
+    build_engine,
+)
+from api_ecommerce.config import DATABASE_SQL, DATABASE_URL
+from api_ecommerce.app.products.etags import bump_catalog_version
 from werkzeug.security import generate_password_hash
 
+PRODUCTS_CSV = "data/raw_data/products.csv"
+PRODUCT_CSV_COLUMNS = {
+    "Nom de produit": "name",
+    "Description du produit": "description",
+    "Catégorie du produit": "category",
+    "Prix unitaire": "price",
+    "Quantité en stock": "stock",
+    "Date d'ajout du produit": "date_creation",
+}
+
+
+@contextmanager
+def suspended_search_index(engine: Engine) -> Iterator[None]:
+    """
+    Stop indexing new products in 'products_fts' during a bulk load, then rebuild
+    the search index once. The trigger is restored even if the load fails.
+
+    Does nothing on databases other than SQLite.
+
+    Args:
+        engine (Engine): The engine connected to the database.
+    """
+    if engine.dialect.name != "sqlite":
+        yield
+        return
+    with engine.begin() as connection:
+        connection.execute(text("DROP TRIGGER IF EXISTS products_fts_insert"))
+    try:
+        yield
+    finally:
+        with engine.begin() as connection:
+            for statement in PRODUCT_SEARCH_DDL:
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+            )
+
+
+def load_products(engine: Engine, path: str, chunksize: int) -> int:
+    """
+    Load a products CSV file into the 'products' table, one chunk at a time.
+
+    Each chunk is renamed and parsed column-wise by pandas, then written with
+    a single Core executemany in its own transaction, so memory use depends on
+    the chunk size only. The progress and throughput are printed after each chunk.
+
+    On SQLite, the trigger indexing each new product in 'products_fts' is dropped
+    during the load and the search index is rebuilt once at the end.
+
+    Args:
+        engine (Engine): The engine connected to the database.
+        path (str): The CSV file, with the columns of PRODUCT_CSV_COLUMNS.
+        chunksize (int): Number of rows read and inserted at once.
+
+    Returns:
+        int: The number of products inserted.
+    """
+    start = time.perf_counter()
+    total = 0
+    chunks = pandas.read_csv(
+        path,
+        usecols=list(PRODUCT_CSV_COLUMNS),
+        dtype={"Prix unitaire": "float64", "Quantité en stock": "Int64"},
+        chunksize=chunksize,
+    )
+    with suspended_search_index(engine):
+        for chunk in chunks:
+            chunk = chunk.rename(columns=PRODUCT_CSV_COLUMNS)
+            chunk["date_creation"] = pandas.to_datetime(chunk["date_creation"])
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            with engine.begin() as connection:
+                connection.execute(insert(Product.__table__), chunk.to_dict("records"))
+                bump_catalog_version(connection)
+            total += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"  {total} products loaded ({total / elapsed:,.0f} rows/s)")
+    return total
+
 
 def init_db():
     """
     Initialize and populate the database with default data.
 
     - Creates an administrator and a standard user.
-    - Loads a list of products from a CSV file and inserts them into the database.
+    - Loads a list of products from a CSV file, in chunks, and inserts them into the database.
     - Adds a sample order for the standard user, including multiple order lines.
 
+    Usage:
+        init-db [--products CSV] [--chunksize N]
+
     Prerequisites:
         - Models User, Product, Command, and CommandLign are defined and imported.
         - The SQLAlchemy engine is initialized.
         - The function 'generate_password_hash' is imported.
-        - The products CSV file is located at '../../data/raw_data/products.csv'.
+        - The products CSV file is located at 'data/raw_data/products.csv' by default.
 
     This function is intended for development and testing purposes.
     """
-    session = sessionmaker(bind=build_engine(DATABASE_SQL)[0])()
+    parser = argparse.ArgumentParser(description="Create and populate the database.")
+    parser.add_argument(
+        "--products", default=PRODUCTS_CSV, help="Products CSV file to load."
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=10000,
+        help="Number of products read and inserted at once (default: 10000).",
+    )
+    args = parser.parse_args()
+
+    engine = build_engine(DATABASE_URL or DATABASE_SQL)[0]
+    session = sessionmaker(bind=engine)()
 
     admin_user = User(
         name="admin",
@@ -43,19 +150,12 @@ def init_db():
     session.add(standard_user)
     session.commit()
 
-    products = pandas.read_csv("data/raw_data/products.csv")
-    for _, product in products.iterrows():
-        new_product = Product(
-            name=product.loc["Nom de produit"],
-            description=product.loc["Description du produit"],
-            category=product.loc["Catégorie du produit"],
-            price=product.loc["Prix unitaire"],
-            stock=product.loc["Quantité en stock"],
-            date_creation=pandas.to_datetime(product.loc["Date d'ajout du produit"]),
-        )
-
-        session.add(new_product)
-    session.commit()
+    start = time.perf_counter()
+    total = load_products(engine, args.products, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ {total} products loaded in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)"
+    )
 
     command = Command(
         user_id=standard_user.id,
@@ -0,0 +1,382 @@
+import argparse
+import datetime
+import itertools
+import random
+import time
+from typing import Iterator, List
+from sqlalchemy import Engine, func, insert, select
+from werkzeug.security import generate_password_hash
+from api_ecommerce.models import (
+    User,
+    Product,
+    Command,
+    CommandLign,
+    COMMAND_STATUS,
+    build_engine,
+)
+from api_ecommerce.app.products.etags import bump_catalog_version
+from api_ecommerce.scripts.build_database import suspended_search_index
+
+GENERATED_PASSWORD = "password"
+GENERATED_CATEGORIES = [
+    "Électronique",
+    "Informatique",
+    "Maison",
+    "Jardin",
+    "Cuisine",
+    "Sport",
+    "Jouets",
+    "Livres",
+    "Musique",
+    "Vêtements",
+    "Chaussures",
+    "Beauté",
+    "Santé",
+    "Auto",
+    "Bricolage",
+    "Animalerie",
+    "Bureau",
+    "Bébé",
+    "Bagages",
+    "Alimentation",
+]
+GENERATED_WORDS = [
+    "rapide",
+    "robuste",
+    "léger",
+    "compact",
+    "élégant",
+    "durable",
+    "pratique",
+    "confortable",
+    "économique",
+    "silencieux",
+    "puissant",
+    "étanche",
+    "ergonomique",
+    "connecté",
+    "recyclé",
+    "premium",
+]
+GENERATED_STATUS_WEIGHTS = [10, 20, 5, 65]
+GENERATED_START = datetime.datetime(2022, 1, 1)
+GENERATED_PERIOD = 3 * 365 * 24 * 3600
+
+
+def zipf_weights(n: int, exponent: float) -> List[float]:
+    """
+    Build the cumulative weights of a Zipf distribution over 'n' ranks.
+
+    The rank 'k' (starting at 1) has a weight proportional to 1 / k ** exponent.
+
+    Args:
+        n (int): Number of ranks.
+        exponent (float): Skew of the distribution, 0 gives a uniform distribution.
+
+    Returns:
+        list: The cumulative weights, usable as 'cum_weights' of random.choices.
+    """
+    return list(itertools.accumulate(1 / rank**exponent for rank in range(1, n + 1)))
+
+
+def random_date(rng: random.Random) -> datetime.datetime:
+    """
+    Draw a date in the three years following GENERATED_START.
+    """
+    return GENERATED_START + datetime.timedelta(seconds=rng.randrange(GENERATED_PERIOD))
+
+
+def generate_users(rng: random.Random, first_id: int, count: int) -> Iterator[dict]:
+    """
+    Yield the rows of 'count' users, the first one being an administrator.
+
+    Every user has the password GENERATED_PASSWORD, hashed once.
+
+    Args:
+        rng (Random): The seeded random generator.
+        first_id (int): Identifier of the first user.
+        count (int): Number of users.
+
+    Yields:
+        dict: A row of the 'users' table.
+    """
+    password = generate_password_hash(GENERATED_PASSWORD, method="pbkdf2:sha256")
+    for user_id in range(first_id, first_id + count):
+        yield {
+            "id": user_id,
+            "email": f"user{user_id}@example.com",
+            "password": password,
+            "name": f"user{user_id}",
+            "role": "admin" if user_id == first_id else "user",
+            "date_creation": random_date(rng),
+        }
+
+
+def generate_products(
+    rng: random.Random, first_id: int, count: int, prices: List[float]
+) -> Iterator[dict]:
+    """
+    Yield the rows of 'count' products, with log-normal prices and categories
+    skewed towards the first ones of GENERATED_CATEGORIES.
+
+    Args:
+        rng (Random): The seeded random generator.
+        first_id (int): Identifier of the first product.
+        count (int): Number of products.
+        prices (list): Filled with the price of each product, in order.
+
+    Yields:
+        dict: A row of the 'products' table.
+    """
+    categories = zipf_weights(len(GENERATED_CATEGORIES), 1.0)
+    for product_id in range(first_id, first_id + count):
+        category = rng.choices(GENERATED_CATEGORIES, cum_weights=categories)[0]
+        price = round(min(rng.lognormvariate(3.5, 1.0), 5000.0), 2)
+        prices.append(price)
+        yield {
+            "id": product_id,
+            "name": f"Produit {product_id:08d}",
+            "description": " ".join(rng.sample(GENERATED_WORDS, 4)),
+            "category": category,
+            "price": price,
+            "stock": rng.randrange(1000),
+            "date_creation": random_date(rng),
+        }
+
+
+def generate_commands(
+    rng: random.Random,
+    first_id: int,
+    count: int,
+    user_ids: List[int],
+    product_ids: List[int],
+    prices: List[float],
+    max_lines: int,
+    exponent: float,
+    lines: List[dict],
+) -> Iterator[dict]:
+    """
+    Yield the rows of 'count' commands, and collect their lines in 'lines'.
+
+    Both the users placing the commands and the products ordered follow a Zipf
+    distribution: a few users order a lot and a few products make most sales.
+    The popularity ranks are shuffled, so they are not correlated with the ids.
+
+    Args:
+        rng (Random): The seeded random generator.
+        first_id (int): Identifier of the first command.
+        count (int): Number of commands.
+        user_ids (list): Identifiers of the users, by popularity rank.
+        product_ids (list): Identifiers of the products, by popularity rank.
+        prices (list): Price of each product of 'product_ids'.
+        max_lines (int): Maximum number of distinct products per command.
+        exponent (float): Skew of the Zipf distributions.
+        lines (list): Filled with the rows of the 'commands_lign' table.
+
+    Yields:
+        dict: A row of the 'commands' table.
+    """
+    users = zipf_weights(len(user_ids), exponent)
+    products = zipf_weights(len(product_ids), exponent)
+    ranks = range(len(product_ids))
+    for command_id in range(first_id, first_id + count):
+        ordered = set(
+            rng.choices(ranks, cum_weights=products, k=rng.randint(1, max_lines))
+        )
+        for rank in sorted(ordered):
+            lines.append(
+                {
+                    "command_id": command_id,
+                    "product_id": product_ids[rank],
+                    "quantity": rng.randint(1, 5),
+                    "price": prices[rank],
+                }
+            )
+        yield {
+            "id": command_id,
+            "user_id": rng.choices(user_ids, cum_weights=users)[0],
+            "status": rng.choices(COMMAND_STATUS, weights=GENERATED_STATUS_WEIGHTS)[0],
+            "address_delivery": f"{rng.randint(1, 200)} rue du Commerce, 44000 Nantes",
+            "date_command": random_date(rng),
+        }
+
+
+def insert_chunks(engine: Engine, table, rows: Iterator[dict], chunksize: int) -> int:
+    """
+    Insert rows with one Core executemany and one transaction per chunk.
+
+    Args:
+        engine (Engine): The engine connected to the database.
+        table (Table): The table to fill.
+        rows (Iterator): The rows to insert.
+        chunksize (int): Number of rows inserted at once.
+
+    Returns:
+        int: The number of rows inserted.
+    """
+    start = time.perf_counter()
+    total = 0
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunksize)):
+        with engine.begin() as connection:
+            connection.execute(insert(table), chunk)
+        total += len(chunk)
+    elapsed = time.perf_counter() - start
+    print(f"  {total} {table.name} inserted ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+    return total
+
+
+def next_id(engine: Engine, model) -> int:
+    """
+    Return the identifier following the greatest identifier of a table.
+    """
+    with engine.connect() as connection:
+        return connection.scalar(select(func.coalesce(func.max(model.id), 0))) + 1
+
+
+def generate_data(
+    engine: Engine,
+    users: int,
+    products: int,
+    commands: int,
+    max_lines: int = 5,
+    exponent: float = 1.1,
+    seed: int = 0,
+    chunksize: int = 10000,
+) -> dict:
+    """
+    Fill a database with a synthetic dataset for load testing.
+
+    The rows are appended after the existing ones, with explicit identifiers so
+    the commands and their lines are inserted without reading them back. The same
+    seed on the same database always gives the same rows.
+
+    Args:
+        engine (Engine): The engine connected to the database.
+        users (int): Number of users, the first one being an administrator.
+        products (int): Number of products.
+        commands (int): Number of commands.
+        max_lines (int): Maximum number of lines per command.
+        exponent (float): Skew of the Zipf popularity of users and products.
+        seed (int): Seed of the random generator.
+        chunksize (int): Number of rows inserted at once.
+
+    Returns:
+        dict: The number of rows inserted in each table.
+    """
+    rng = random.Random(seed)
+    first_user = next_id(engine, User)
+    first_product = next_id(engine, Product)
+    first_command = next_id(engine, Command)
+
+    prices = []
+    inserted = {
+        "users": insert_chunks(
+            engine, User.__table__, generate_users(rng, first_user, users), chunksize
+        )
+    }
+    with suspended_search_index(engine):
+        inserted["products"] = insert_chunks(
+            engine,
+            Product.__table__,
+            generate_products(rng, first_product, products, prices),
+            chunksize,
+        )
+    with engine.begin() as connection:
+        bump_catalog_version(connection)
+
+    user_ids = list(range(first_user, first_user + users))
+    ranks = list(range(products))
+    rng.shuffle(user_ids)
+    rng.shuffle(ranks)
+    product_ids = [first_product + rank for rank in ranks]
+    prices = [prices[rank] for rank in ranks]
+
+    inserted["commands"] = 0
+    inserted["commands_lign"] = 0
+    for start in range(0, commands, chunksize):
+        lines = []
+        inserted["commands"] += insert_chunks(
+            engine,
+            Command.__table__,
+            generate_commands(
+                rng,
+                first_command + start,
+                min(chunksize, commands - start),
+                user_ids,
+                product_ids,
+                prices,
+                max_lines,
+                exponent,
+                lines,
+            ),
+            chunksize,
+        )
+        inserted["commands_lign"] += insert_chunks(
+            engine, CommandLign.__table__, lines, chunksize
+        )
+    return inserted
+
+
+def generate_db():
+    """
+    Create or extend a database with a large synthetic dataset for load testing.
+
+    Usage:
+        generate-db [DATABASE] [--users N] [--products N] [--commands N]
+                    [--max-lines N] [--zipf S] [--seed N] [--chunksize N]
+
+    The database is 'data/db_data/<DATABASE>.db' (default: ecommerce_load).
+    Every generated user has the password 'password', the first one is an admin.
+    """
+    parser = argparse.ArgumentParser(
+        description="Fill a database with a synthetic dataset for load testing."
+    )
+    parser.add_argument(
+        "database",
+        nargs="?",
+        default="ecommerce_load",
+        help="Database name without extension (default: ecommerce_load).",
+    )
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--commands", type=int, default=200000)
+    parser.add_argument(
+        "--max-lines",
+        type=int,
+        default=5,
+        help="Maximum number of lines per command (default: 5).",
+    )
+    parser.add_argument(
+        "--zipf",
+        type=float,
+        default=1.1,
+        help="Skew of the popularity of users and products (default: 1.1).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunksize", type=int, default=10000)
+    args = parser.parse_args()
+    if min(args.users, args.products, args.max_lines, args.chunksize) < 1:
+        parser.error("--users, --products, --max-lines and --chunksize must be >= 1.")
+
+    engine = build_engine(args.database)[0]
+    start = time.perf_counter()
+    inserted = generate_data(
+        engine,
+        args.users,
+        args.products,
+        args.commands,
+        args.max_lines,
+        args.zipf,
+        args.seed,
+        args.chunksize,
+    )
+    engine.dispose()
+    print(
+        f"✅ Database {args.database} generated in {time.perf_counter() - start:.2f}s : "
+        f"{inserted}"
+    )
+
+
+if __name__ == "__main__":
+    generate_db()
@@ -0,0 +1,67 @@
+import argparse
+from pathlib import Path
+from typing import List
+from sqlalchemy import Engine, inspect
+from api_ecommerce.models import Base, build_engine
+
+DB_DIRECTORY = Path("data/db_data")
+
+
+def migrate_database(engine: Engine) -> List[str]:
+    """
+    Bring an existing database up to date with the schema declared by the models.
+
+    'Base.metadata.create_all' only creates the indexes of the tables it creates,
+    so the indexes added to existing tables are created here.
+
+    Args:
+        engine (Engine): The engine connected to the database to migrate.
+
+    Returns:
+        list: The names of the indexes created.
+    """
+    Base.metadata.create_all(engine)
+    created = []
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    index.create(connection)
+                    created.append(index.name)
+    return created
+
+
+def migrate_db():
+    """
+    Apply the schema migrations to the databases of 'data/db_data'.
+
+    Usage:
+        migrate-db [DATABASE ...]
+
+    Without arguments every '.db' file of 'data/db_data' is migrated, otherwise
+    only the given databases (names without extension).
+    """
+    parser = argparse.ArgumentParser(
+        description="Create the missing tables and indexes of the databases."
+    )
+    parser.add_argument(
+        "databases",
+        nargs="*",
+        help="Database names without extension (default: every database of data/db_data).",
+    )
+    args = parser.parse_args()
+    names = args.databases or sorted(path.stem for path in DB_DIRECTORY.glob("*.db"))
+
+    for name in names:
+        engine = build_engine(name)[0]
+        created = migrate_database(engine)
+        engine.dispose()
+        print(
+            f"✅ Database {name} migrated, {len(created)} index(es) created : {created}"
+        )
+
+
+if __name__ == "__main__":
+    migrate_db()
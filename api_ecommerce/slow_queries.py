@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+from flask import has_request_context, request
+from sqlalchemy import Engine, event
+from api_ecommerce.config import (
+    SLOW_QUERY_LOG,
+    SLOW_QUERY_LOG_BACKUPS,
+    SLOW_QUERY_LOG_SIZE,
+    SLOW_QUERY_THRESHOLD,
+)
+
+# Parameter sets of an executemany written in the log, the others are counted.
+LOGGED_PARAMETER_SETS = 10
+logger = logging.getLogger("api_ecommerce.slow_queries")
+logger.propagate = False
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format a record as one JSON object per line, its 'query' extra merged in.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            **getattr(record, "query", {}),
+        }
+        return json.dumps(entry, default=str)
+
+
+def open_log(path: str, size: int, backups: int) -> None:
+    """
+    Write the slow query log to a rotating file, once per file.
+
+    Args:
+        path (str): The path of the log file, its directory created if needed.
+        size (int): The size of the file triggering a rotation, in bytes.
+        backups (int): The number of rotated files kept.
+    """
+    path = os.path.abspath(path)
+    if any(getattr(h, "baseFilename", None) == path for h in logger.handlers):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=size, backupCount=backups)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+
+
+def explain(connection, statement: str, parameters) -> Optional[list]:
+    """
+    Return the SQLite query plan of a statement, None on other databases.
+
+    The plan is read on a new cursor of the same connection, so the rows still
+    to be fetched from the slow statement are left untouched.
+
+    Args:
+        connection (Connection): The connection which ran the statement.
+        statement (str): The SQL statement.
+        parameters: Its bound parameters.
+
+    Returns:
+        list: The 'detail' column of each step of the plan.
+    """
+    if connection.dialect.name != "sqlite":
+        return None
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in cursor.fetchall()]
+    except Exception as error:  # The plan must never fail the request.
+        return [f"unavailable: {error}"]
+    finally:
+        cursor.close()
+
+
+class SlowQueryLog:
+    """
+    Log the statements of an engine running longer than a threshold.
+
+    Each entry holds the statement, its bound parameters, its duration, the
+    Flask endpoint and URL of the request which ran it and, on SQLite, its
+    EXPLAIN QUERY PLAN. The fast statements only cost two clock reads.
+
+    Args:
+        threshold (float): The duration from which a statement is logged, in seconds.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    def before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        context._slow_query_start = time.perf_counter()
+
+    def after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        duration = time.perf_counter() - context._slow_query_start
+        if duration < self.threshold:
+            return
+        query = {
+            "duration": round(duration, 6),
+            "statement": statement,
+            "parameters": parameters,
+            "endpoint": None,
+            "path": None,
+        }
+        if executemany:
+            query["parameters"] = parameters[:LOGGED_PARAMETER_SETS]
+            query["parameter_sets"] = len(parameters)
+            parameters = parameters[0] if parameters else ()
+        if has_request_context():
+            query["endpoint"] = request.endpoint
+            query["path"] = request.full_path.rstrip("?")
+        query["plan"] = explain(conn, statement, parameters)
+        logger.warning("slow query", extra={"query": query})
+
+
+def init_slow_query_log(
+    engine: Engine,
+    threshold: Optional[float] = SLOW_QUERY_THRESHOLD,
+    path: str = SLOW_QUERY_LOG,
+) -> None:
+    """
+    Log the slow statements of an engine, if a threshold is configured.
+
+    Args:
+        engine (Engine): The engine to watch (the 'sync_engine' of an AsyncEngine).
+        threshold (float, optional): The duration from which a statement is
+                                     logged, in seconds (None: disabled).
+        path (str): The path of the log file.
+    """
+    if threshold is None:
+        return
+    open_log(path, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_LOG_BACKUPS)
+    slow_query_log = SlowQueryLog(threshold)
+    event.listen(engine, "before_cursor_execute", slow_query_log.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", slow_query_log.after_cursor_execute)
@@ -7,6 +7,8 @@ from api_ecommerce.config import SECRET_KEY
 
 dotenv.load_dotenv()
 DATABASE_SQL_TEST = os.getenv("DATABASE_SQL_TEST")
+# Emitted by the session fixture to isolate each test, not by the routes.
+SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
 
 
 @pytest.fixture(scope="session")
@@ -30,16 +32,48 @@ def session(app):
             nested = connection.begin_nested()
 
     real_factory = app.session_factory
-    app.session_factory = lambda: session
+    real_read_factory = app.read_session_factory
+    # The read-only routes see the uncommitted rows of the test as well.
+    app.session_factory = app.read_session_factory = lambda: session
+    # Cached rows must not outlive the rolled back transaction of a test.
+    app.product_cache.clear()
+    app.user_cache.clear()
+    # Requests share this session with the test : their teardown must not close it.
+    real_close = session.close
+    session.close = lambda: None
 
     yield session
 
     app.session_factory = real_factory  # Restore après test
-    session.close()
+    app.read_session_factory = real_read_factory
+    app.product_cache.clear()
+    app.user_cache.clear()
+    real_close()
     transaction.rollback()
     connection.close()
 
 
+@pytest.fixture
+def queries(session):
+    """
+    Fixture: Record the SQL statements sent to the database during a test.
+
+    Every statement is recorded once with its parameters, an executemany included,
+    except the savepoints of the session fixture. Clear the list before the request
+    to measure, then compare its length with the query budget of the route.
+    """
+    engine = session.get_bind().engine
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(SAVEPOINT_STATEMENTS):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield captured
+    event.remove(engine, "before_cursor_execute", capture)
+
+
 @pytest.fixture
 def client(app):
     with app.test_client() as client:
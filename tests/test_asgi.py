@@ -0,0 +1,200 @@
+import asyncio
+import json
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.security import generate_password_hash
+from api_ecommerce.models import Base, User, Product
+from api_ecommerce.app import create_app
+from api_ecommerce.app.asgi import AsyncApp
+from api_ecommerce.config import SECRET_KEY
+
+# The asyncio driver is an optional dependency (extra 'async').
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_app(tmp_path):
+    """
+    Fixture: The ASGI application on a new database holding an admin and 30 products.
+    """
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            User.__table__.insert(),
+            {
+                "email": "admin@example.com",
+                "password": generate_password_hash("admin", method="pbkdf2:sha256"),
+                "role": "admin",
+            },
+        )
+        connection.execute(
+            Product.__table__.insert(),
+            [
+                {
+                    "name": f"Async {i}",
+                    "description": "",
+                    "category": "Cat",
+                    "price": i,
+                    "stock": 10,
+                }
+                for i in range(30)
+            ],
+        )
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    app = AsyncApp(create_app(engine=async_engine.sync_engine), async_engine)
+    app.app.config.update({"TESTING": True, "SECRET_KEY": SECRET_KEY})
+    yield app
+    asyncio.run(async_engine.dispose())
+
+
+async def call(app, method, path, body=None, headers=None, chunk=16):
+    """
+    Send a request to an ASGI application, its body split in chunks of 'chunk' bytes.
+
+    Returns:
+        tuple: The status, the headers and the body messages of the response.
+    """
+    path, _, query = path.partition("?")
+    content = json.dumps(body).encode() if body is not None else b""
+    chunks = [content[i : i + chunk] for i in range(0, len(content), chunk)] or [b""]
+    messages = [
+        {"type": "http.request", "body": part, "more_body": i < len(chunks) - 1}
+        for i, part in enumerate(chunks)
+    ]
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query.encode(),
+        "headers": [
+            (b"content-type", b"application/json"),
+            *[(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        ],
+    }
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start, *bodies = sent
+    return start["status"], dict(start["headers"]), bodies
+
+
+def test_asgi_serves_routes(async_app):
+    """
+    Test the routes answer through the ASGI adapter as through Flask.
+    Expects:
+        - A streamed request body read (login) and a JWT returned
+        - The admin routes writing through the AsyncSession
+        - The JSON errors and the ETag of the conditional reads
+    """
+
+    async def scenario():
+        status, _, bodies = await call(
+            async_app,
+            "POST",
+            "/api/auth/login",
+            {"email": "admin@example.com", "password": "admin"},
+        )
+        assert status == 200
+        token = json.loads(b"".join(m["body"] for m in bodies))["token"]
+        auth = {"Authorization": f"Bearer {token}"}
+
+        product = {"name": "New", "description": "", "category": "C", "price": 2}
+        status, _, bodies = await call(
+            async_app, "POST", "/api/product", {**product, "stock": 1}, auth
+        )
+        assert status == 201
+        created = json.loads(bodies[0]["body"])
+
+        status, headers, bodies = await call(
+            async_app, "GET", f"/api/product/{created['id']}"
+        )
+        assert status == 200 and b"etag" in headers
+        assert json.loads(bodies[0]["body"]) == created
+
+        status, _, bodies = await call(async_app, "GET", "/api/product/999")
+        assert status == 404
+        assert "error" in json.loads(bodies[0]["body"])
+
+    asyncio.run(scenario())
+
+
+def test_asgi_keeps_requests_in_flight(async_app):
+    """
+    Test concurrent requests are served together by one event loop.
+    Expects:
+        - Every request answered
+        - Several sessions holding a connection at the same time
+    """
+
+    async def scenario():
+        return await asyncio.gather(
+            *[
+                call(
+                    async_app, "GET", f"/api/products?limit=5&fields=name&max_price={i}"
+                )
+                for i in range(20)
+            ]
+        )
+
+    responses = asyncio.run(scenario())
+    assert [status for status, _, _ in responses] == [200] * 20
+    assert async_app.app.pool_metrics.snapshot()["peak_checked_out"] > 1
+
+
+def test_asgi_streams_responses(async_app, monkeypatch):
+    """
+    Test a streamed response is sent in several body messages.
+    """
+
+    async def scenario():
+        _, _, bodies = await call(
+            async_app,
+            "POST",
+            "/api/auth/login",
+            {"email": "admin@example.com", "password": "admin"},
+        )
+        token = json.loads(bodies[0]["body"])["token"]
+        return await call(
+            async_app,
+            "GET",
+            "/api/export/products?format=ndjson",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+    monkeypatch.setattr("api_ecommerce.app.exports.routes.EXPORT_BATCH_SIZE", 10)
+    status, _, bodies = asyncio.run(scenario())
+    assert status == 200
+    assert len(bodies) > 2 and not bodies[-1].get("more_body")
+    lines = b"".join(m["body"] for m in bodies).splitlines()
+    assert len(lines) == 30
+
+
+def test_asgi_refuses_other_scopes(async_app):
+    """
+    Test a websocket connection is closed and unknown scopes are ignored.
+    """
+    sent = []
+
+    async def receive():
+        return {"type": "websocket.connect"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def scenario():
+        await async_app({"type": "websocket", "path": "/ws"}, receive, send)
+        await async_app({"type": "custom"}, receive, send)
+
+    asyncio.run(scenario())
+    assert sent == [{"type": "websocket.close"}]
@@ -1,5 +1,8 @@
+import threading
+import time
 import pytest
-from werkzeug.security import generate_password_hash
+from werkzeug.security import generate_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from api_ecommerce.app.auth.hashing import HashPool, HashPoolError, normalize_method
 
 
 def test_register_success(client, session):
@@ -131,3 +134,115 @@ def test_login_bad_password(client, session, user_in_db):
     response = client.post("/api/auth/login", json=payload)
     assert response.status_code == 401
     assert "Could not verify" in response.get_json().get("error", "")
+
+
+def test_login_rehashes_outdated_hash(app, client, session):
+    """
+    Test a password hashed with outdated parameters is hashed again on login.
+    Expects:
+        - Successful login with the old hash
+        - The stored hash using the configured method afterwards
+    """
+    from api_ecommerce.models import User
+
+    user = User(
+        email="olduser@example.com",
+        password=generate_password_hash("oldpass", method="pbkdf2:sha256:1000"),
+        role="user",
+    )
+    session.add(user)
+    session.commit()
+    rehashed = app.hash_pool.stats()["rehashed"]
+
+    payload = {"email": "olduser@example.com", "password": "oldpass"}
+    assert client.post("/api/auth/login", json=payload).status_code == 200
+    session.refresh(user)
+    assert user.password.startswith(app.hash_pool.method + "$")
+    assert app.hash_pool.stats()["rehashed"] == rehashed + 1
+    assert client.post("/api/auth/login", json=payload).status_code == 200
+    assert app.hash_pool.stats()["rehashed"] == rehashed + 1
+
+
+def test_login_hash_pool_busy(monkeypatch, app, client, user_in_db):
+    """
+    Test a saturated hash pool answers 503 with a Retry-After header.
+    """
+
+    def busy(*args):
+        raise HashPoolError("Too many password checks in progress.")
+
+    monkeypatch.setattr(app.hash_pool, "submit", busy)
+    payload = {"email": "loginuser@example.com", "password": "strongpass"}
+    response = client.post("/api/auth/login", json=payload)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    response = client.post("/api/auth/register", json={**payload, "email": "x@y.z"})
+    assert response.status_code == 503
+
+
+def test_normalize_method():
+    """
+    Test hash methods are completed with the parameters werkzeug writes, and
+    unsupported methods rejected.
+    """
+    assert normalize_method("pbkdf2:sha256") == (
+        f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+    )
+    assert normalize_method("pbkdf2:sha512:1000") == "pbkdf2:sha512:1000"
+    with pytest.raises(ValueError):
+        normalize_method("bcrypt")
+    pool = HashPool("pbkdf2:sha256:1000", workers=1, queue_size=0, timeout=5)
+    try:
+        assert pool.hash("secret").startswith("pbkdf2:sha256:1000$")
+    finally:
+        pool.shutdown(wait=True)
+
+
+def test_hash_pool_bounds():
+    """
+    Test the hash pool limits its queue and the wait of each hash.
+    Expects:
+        - A hash abandoned after the timeout, its queue slot freed if not started
+        - A hash rejected once every worker and queue slot is taken
+        - The queue depth and the counters reported by stats
+    """
+    pool = HashPool("pbkdf2:sha256:1000", workers=1, queue_size=1, timeout=0.05)
+    release = threading.Event()
+    started = threading.Event()
+    results = []
+
+    def blocked():
+        started.set()
+        release.wait()
+        return "done"
+
+    def queued():
+        results.append(pool.submit(str))
+
+    waiting = threading.Thread(target=queued)
+    try:
+        with pytest.raises(HashPoolError, match="timed out"):
+            pool.submit(blocked)
+        started.wait()
+        stats = pool.stats()
+        assert (stats["running"], stats["queued"], stats["timeouts"]) == (1, 0, 1)
+
+        with pytest.raises(HashPoolError, match="timed out"):
+            pool.submit(str)
+        stats = pool.stats()
+        assert (stats["queued"], stats["timeouts"], stats["peak_queued"]) == (0, 2, 1)
+
+        pool.timeout = 5
+        waiting.start()
+        while pool.stats()["queued"] < 1:
+            time.sleep(0.001)
+        with pytest.raises(HashPoolError, match="Too many"):
+            pool.submit(str)
+    finally:
+        release.set()
+        if waiting.is_alive():
+            waiting.join()
+        pool.shutdown(wait=True)
+    stats = pool.stats()
+    assert results == [""]
+    assert (stats["rejected"], stats["queued"], stats["running"]) == (1, 0, 0)
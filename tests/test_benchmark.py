@@ -0,0 +1,70 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from api_ecommerce.models import User
+from api_ecommerce.scripts.benchmark import (
+    BENCHMARK_SCENARIOS,
+    benchmark_context,
+    client_sender,
+    percentile,
+    run_benchmark,
+)
+
+
+@pytest.fixture
+def credentials(session):
+    """
+    Fixture: Credentials of an admin and a regular user of the benchmark.
+    """
+    for role in ("admin", "user"):
+        session.add(
+            User(
+                email=f"bench-{role}@example.com",
+                password=generate_password_hash(role, method="pbkdf2:sha256"),
+                role=role,
+            )
+        )
+    session.commit()
+    return {role: (f"bench-{role}@example.com", role) for role in ("admin", "user")}
+
+
+def test_every_route_has_a_scenario(app):
+    """
+    Test every route of the API is benchmarked, under its endpoint name.
+    """
+    endpoints = {
+        rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != "static"
+    }
+    assert endpoints == set(BENCHMARK_SCENARIOS)
+
+
+def test_percentile():
+    """
+    Test the nearest-rank percentiles.
+    """
+    values = list(range(1, 101))
+    assert [percentile(values, rank) for rank in (50, 95, 99, 100)] == [50, 95, 99, 100]
+    assert percentile([7], 99) == 7
+
+
+def test_run_benchmark(app, session, credentials, capsys):
+    """
+    Test every scenario runs through the test client and reports its latencies.
+    Expects:
+        - The requested number of requests per scenario, without server error
+        - Ordered percentiles and a throughput
+        - One printed line per scenario
+    """
+    ctx = benchmark_context(session.get_bind().engine, credentials)
+    names = list(BENCHMARK_SCENARIOS)
+
+    results = run_benchmark(
+        lambda: client_sender(app.test_client()), ctx, names, requests=2
+    )
+
+    assert list(results) == names
+    for name, result in results.items():
+        assert result["requests"] == 2
+        assert all(int(status) < 500 for status in result["statuses"]), name
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["requests_per_second"] > 0
+    assert len(capsys.readouterr().out.splitlines()) == len(names)
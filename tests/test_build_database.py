@@ -0,0 +1,61 @@
+import datetime
+from sqlalchemy import create_engine, select, insert, text
+from api_ecommerce.models import Base, Product
+from api_ecommerce.scripts.build_database import load_products, PRODUCTS_CSV
+
+PRODUCT = {"description": "d", "category": "c", "price": 1.0, "stock": 1}
+
+
+def test_load_products_in_chunks(tmp_path, capsys):
+    """
+    Test the products CSV is loaded chunk by chunk with parsed values.
+    Expects:
+        - Every row of the CSV inserted, with typed price, stock and date
+        - One progress line per chunk
+        - The search index rebuilt, and kept in sync again afterwards
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'build.db'}")
+    Base.metadata.create_all(engine)
+
+    total = load_products(engine, PRODUCTS_CSV, chunksize=20)
+
+    with engine.connect() as connection:
+        products = connection.execute(select(Product).order_by(Product.id)).all()
+    assert total == len(products) == 50
+    first = products[0]
+    assert first.name == "Ordinateur Portable X200"
+    assert (first.price, first.stock) == (1200.0, 50)
+    assert first.date_creation == datetime.datetime(2023, 10, 1)
+    assert len(capsys.readouterr().out.splitlines()) == 3
+
+    with engine.begin() as connection:
+        found = connection.execute(
+            text("SELECT rowid FROM products_fts WHERE products_fts MATCH 'portable'")
+        ).scalars()
+        assert first.id in list(found)
+        connection.execute(insert(Product), [{**PRODUCT, "name": "Triggered"}])
+        found = connection.execute(
+            text(
+                "SELECT count(*) FROM products_fts WHERE products_fts MATCH 'triggered'"
+            )
+        ).scalar()
+        assert found == 1
+
+
+def test_load_products_missing_values(tmp_path):
+    """
+    Test empty stock and date cells are stored as NULL.
+    """
+    path = tmp_path / "products.csv"
+    path.write_text(
+        "ID,Nom de produit,Description du produit,Catégorie du produit,"
+        "Prix unitaire,Quantité en stock,Date d'ajout du produit\n"
+        "1,Empty,No stock,Tests,2.5,,\n"
+    )
+    engine = create_engine(f"sqlite:///{tmp_path / 'build.db'}")
+    Base.metadata.create_all(engine)
+
+    assert load_products(engine, str(path), chunksize=10) == 1
+    with engine.connect() as connection:
+        product = connection.execute(select(Product)).one()
+    assert (product.stock, product.date_creation) == (None, None)
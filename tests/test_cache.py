@@ -0,0 +1,77 @@
+import time
+import pytest
+from api_ecommerce.app.cache import (
+    Cache,
+    LRUCacheBackend,
+    SharedCacheBackend,
+    MISSING,
+    build_cache,
+)
+
+
+def test_lru_backend_evicts_least_recently_used():
+    """
+    Test the LRU backend keeps at most 'maxsize' keys, evicting the least recently used.
+    """
+    backend = LRUCacheBackend(maxsize=2, ttl=60)
+    backend.set(1, "a")
+    backend.set(2, "b")
+    backend.get(1)
+    backend.set(3, "c")
+    assert backend.get(2) is MISSING
+    assert backend.get(1) == "a"
+    assert backend.get(3) == "c"
+    assert len(backend) == 2
+
+
+def test_lru_backend_expires_keys():
+    """
+    Test keys are dropped once their TTL is over.
+    """
+    backend = LRUCacheBackend(maxsize=2, ttl=0.01)
+    backend.set(1, "a")
+    time.sleep(0.02)
+    assert backend.get(1) is MISSING
+
+
+def test_shared_backend_returns_copies():
+    """
+    Test the shared backend stores serialized values, as a cache server would.
+    """
+    store = {}
+    backend = SharedCacheBackend(ttl=60, store=store)
+    value = {"id": 1, "name": "Chips"}
+    backend.set(1, value)
+    value["name"] = "Changed"
+    assert backend.get(1) == {"id": 1, "name": "Chips"}
+    assert SharedCacheBackend(ttl=60, store=store).get(1)["name"] == "Chips"
+
+
+def test_cache_read_through_counters():
+    """
+    Test the cache calls the loader on a miss only and counts hits and misses.
+    """
+    cache = Cache(LRUCacheBackend(maxsize=10, ttl=60))
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"id": 1}
+
+    assert cache.get_or_load(1, loader) == {"id": 1}
+    assert cache.get_or_load(1, loader) == {"id": 1}
+    assert cache.get_or_load(2, lambda: None) is None
+    assert len(calls) == 1
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3}
+
+    cache.invalidate(1)
+    cache.get_or_load(1, loader)
+    assert len(calls) == 2
+
+
+def test_build_cache_unknown_backend():
+    """
+    Test an unknown backend name is rejected.
+    """
+    with pytest.raises(ValueError, match="memcached"):
+        build_cache("memcached", 10, 60)
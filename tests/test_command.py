@@ -1,3 +1,4 @@
+import pstats
 import pytest
 from api_ecommerce.models import Command, CommandLign, User, Product
 from werkzeug.security import generate_password_hash
@@ -110,7 +111,7 @@ def test_list_commands_user(client, session, user_token, user, command):
     headers = {"Authorization": f"Bearer {user_token}"}
     response = client.get("/api/commands", headers=headers)
     assert response.status_code == 200
-    commands = response.get_json()
+    commands = response.get_json()["commands"]
     assert any(cmd["command_id"] == command.id for cmd in commands)
 
 
@@ -121,15 +122,186 @@ def test_list_commands_admin(client, session, admin_token, command):
     headers = {"Authorization": f"Bearer {admin_token}"}
     response = client.get("/api/commands", headers=headers)
     assert response.status_code == 200
-    commands = response.get_json()
+    commands = response.get_json()["commands"]
     assert any(cmd["command_id"] == command.id for cmd in commands)
 
 
+def test_list_commands_pagination(client, session, admin_token, user):
+    """
+    Test list_commands pages through the commands with the 'next' cursor.
+    """
+    for _ in range(3):
+        session.add(
+            Command(
+                user_id=user.id,
+                status="on hold",
+                address_delivery="Street 2",
+                date_command=datetime.datetime.now(),
+            )
+        )
+    session.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    params = {"limit": 2, "user_id": user.id}
+    first = client.get("/api/commands", headers=headers, query_string=params)
+    assert first.status_code == 200
+    assert len(first.get_json()["commands"]) == 2
+    params["cursor"] = first.get_json()["next"]
+    second = client.get("/api/commands", headers=headers, query_string=params)
+    assert len(second.get_json()["commands"]) == 1
+    assert second.get_json()["next"] is None
+
+
+def test_list_commands_filters(client, session, admin_token, user, command):
+    """
+    Test list_commands applies the status, date and user filters.
+    """
+    session.add(
+        Command(
+            user_id=user.id,
+            status="shipped",
+            address_delivery="Street 3",
+            date_command=datetime.datetime(2020, 1, 1),
+        )
+    )
+    session.commit()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    params = {"status": "shipped", "user_id": user.id, "date_to": "2021-01-01"}
+    response = client.get("/api/commands", headers=headers, query_string=params)
+    assert response.status_code == 200
+    commands = response.get_json()["commands"]
+    assert [cmd["status"] for cmd in commands] == ["shipped"]
+
+    params = {"user_id": user.id, "date_from": "2021-01-01"}
+    response = client.get("/api/commands", headers=headers, query_string=params)
+    assert [cmd["command_id"] for cmd in response.get_json()["commands"]] == [
+        command.id
+    ]
+
+
+def test_list_commands_user_filter_ignored(client, session, user_token, admin):
+    """
+    Test a regular user cannot list the commands of another user with user_id.
+    """
+    session.add(
+        Command(
+            user_id=admin.id,
+            status="on hold",
+            address_delivery="Street 4",
+            date_command=datetime.datetime.now(),
+        )
+    )
+    session.commit()
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = client.get(
+        "/api/commands", headers=headers, query_string={"user_id": admin.id}
+    )
+    assert response.status_code == 404
+
+
+def test_list_commands_bad_filter(client, admin_token):
+    """
+    Test list_commands returns 400 for an unknown status.
+    """
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.get(
+        "/api/commands", headers=headers, query_string={"status": "lost"}
+    )
+    assert response.status_code == 400
+    assert "status" in response.get_json()["error"]
+
+
+def test_user_required_cached(app, client, session, user_token, command):
+    """
+    Test the authenticated user is read from the cache on the following requests.
+    """
+    headers = {"Authorization": f"Bearer {user_token}"}
+    before = app.user_cache.stats()
+    for _ in range(3):
+        assert client.get("/api/commands", headers=headers).status_code == 200
+    after = app.user_cache.stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+
+def test_user_required_cache_invalidated(client, session, user_token, user, command):
+    """
+    Test a change of role is seen by the next request despite the user cache.
+    """
+    headers = {"Authorization": f"Bearer {user_token}"}
+    payload = {"status": "validated"}
+    response = client.patch(f"/api/command/{command.id}", json=payload, headers=headers)
+    assert response.status_code == 403
+
+    user.role = "admin"
+    session.commit()
+    response = client.patch(f"/api/command/{command.id}", json=payload, headers=headers)
+    assert response.status_code == 200
+
+
+def test_user_required_profile(
+    client, session, admin_token, user_token, command, tmp_path, monkeypatch
+):
+    """
+    Test the 'X-Profile' header profiles the requests of admins only.
+    Expects:
+        - The profile of an admin request stored and named in X-Profile-File
+        - The request of a user served without profiling
+        - The oldest profiles pruned beyond PROFILE_KEEP
+    """
+    monkeypatch.setattr("api_ecommerce.app.profiling.PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr("api_ecommerce.app.profiling.PROFILE_KEEP", 2)
+
+    for _ in range(3):
+        response = client.get(
+            "/api/commands",
+            headers={"Authorization": f"Bearer {admin_token}", "X-Profile": "1"},
+        )
+        assert response.status_code == 200
+        assert response.json["commands"]
+    name = response.headers["X-Profile-File"]
+    assert name.startswith("commands.list_commands-")
+    stats = pstats.Stats(str(tmp_path / name))
+    assert any(func[2] == "list_commands" for func in stats.stats)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    response = client.get(
+        "/api/commands",
+        headers={"Authorization": f"Bearer {user_token}", "X-Profile": "1"},
+    )
+    assert response.status_code == 200
+    assert "X-Profile-File" not in response.headers
+
+
+def test_user_cache_invalidated_on_commit(app, session, user):
+    """
+    Test a changed user leaves the cache when the change commits, not before.
+    Expects:
+        - The cached user kept after a flush and after a rollback
+        - The cached user invalidated by the commit
+    """
+    cached = {"id": user.id, "email": user.email, "name": None, "role": "user"}
+    app.user_cache.get_or_load(user.id, lambda: cached)
+    is_cached = lambda: app.user_cache.get_or_load(user.id, lambda: None) is not None
+
+    user.role = "admin"
+    session.flush()
+    assert is_cached()
+    session.rollback()
+    assert is_cached()
+
+    user.role = "admin"
+    session.flush()
+    assert is_cached()
+    session.commit()
+    assert not is_cached()
+
+
 def test_list_commands_not_found(client, session, admin_token):
     """
     Test list_commands returns 404 if there are no commands.
     """
     headers = {"Authorization": f"Bearer {admin_token}"}
+    session.query(CommandLign).delete()
     session.query(Command).delete()
     session.commit()
     response = client.get("/api/commands", headers=headers)
@@ -191,6 +363,64 @@ def test_create_command_empty_products(client, user_token):
     assert "at least one product" in response.get_json()["error"]
 
 
+def test_create_command_success(client, session, user_token, user, product):
+    """
+    Test creating a command writes the command and one line per distinct product.
+    """
+    payload = {
+        "address_delivery": "Paris",
+        "product_id": [product.id, product.id, product.id],
+    }
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = client.post("/api/command/", json=payload, headers=headers)
+    assert response.status_code == 201
+    data = response.get_json()
+    assert data["user_id"] == user.id
+    ligns = session.query(CommandLign).filter_by(command_id=data["id"]).all()
+    assert [(lign.product_id, lign.quantity) for lign in ligns] == [(product.id, 3)]
+    session.refresh(product)
+    assert product.stock == 7
+
+
+def test_create_command_whole_stock(client, session, user_token, product):
+    """
+    Test the last units of a product can be ordered, and not one more.
+    """
+    headers = {"Authorization": f"Bearer {user_token}"}
+    payload = {"address_delivery": "Paris", "product_id": [product.id] * 10}
+    response = client.post("/api/command/", json=payload, headers=headers)
+    assert response.status_code == 201
+    assert client.get(f"/api/product/{product.id}").get_json()["stock"] == 0
+
+    payload = {"address_delivery": "Paris", "product_id": [product.id]}
+    response = client.post("/api/command/", json=payload, headers=headers)
+    assert response.status_code == 500
+    assert "not sufficient 1 > 0" in response.get_json()["error"]
+
+
+def test_create_command_unknown_product(client, session, user_token, user, product):
+    """
+    Test creating a command with an unknown product saves nothing.
+    """
+    payload = {"address_delivery": "Paris", "product_id": [product.id, 999999]}
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = client.post("/api/command/", json=payload, headers=headers)
+    assert response.status_code == 500
+    assert "999999 not exist" in response.get_json()["error"]
+    assert session.query(Command).filter_by(user_id=user.id).count() == 0
+
+
+def test_create_command_insufficient_stock(client, session, user_token, product):
+    """
+    Test creating a command for more products than in stock is refused.
+    """
+    payload = {"address_delivery": "Paris", "product_id": [product.id] * 11}
+    headers = {"Authorization": f"Bearer {user_token}"}
+    response = client.post("/api/command/", json=payload, headers=headers)
+    assert response.status_code == 500
+    assert "not sufficient" in response.get_json()["error"]
+
+
 def test_update_command_status_missing_status(client, admin_token, command):
     """
     Test updating a command without a 'status' returns 404.
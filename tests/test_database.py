@@ -0,0 +1,158 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from api_ecommerce.app import create_app
+from api_ecommerce.app.database import get_session
+from api_ecommerce.models import (
+    Product,
+    build_async_engine,
+    build_engine,
+    database_url,
+    engine_options,
+)
+
+
+def test_get_session_reused_within_request(app):
+    """
+    Test the request session is opened once and shared for the whole request.
+    Expects:
+        - The same session on every call inside a request
+        - A new session for the next request
+    """
+    with app.test_request_context():
+        first = get_session()
+        assert get_session() is first
+    with app.test_request_context():
+        assert get_session() is not first
+
+
+def test_session_released_on_teardown(app):
+    """
+    Test the request session is released, and its connection returned to the pool,
+    when the request ends.
+    Expects:
+        - No connection left checked out after the request
+        - Pending changes rolled back when the request fails
+    """
+    before = app.pool_metrics.snapshot()
+    try:
+        with app.test_request_context():
+            session = get_session()
+            session.connection()
+            assert (
+                app.pool_metrics.snapshot()["checked_out"] == before["checked_out"] + 1
+            )
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    after = app.pool_metrics.snapshot()
+    assert after["checked_out"] == before["checked_out"]
+    assert after["checkins"] == before["checkins"] + 1
+    assert not session.in_transaction()
+
+
+def test_protected_route_single_checkout(app, client):
+    """
+    Test an authenticated request checks out a single connection, shared by
+    the authentication decorator and the route handler.
+    Expects:
+        - Exactly one pool checkout for the request
+    """
+    token = client.post(
+        "/api/auth/login", json={"email": "admin@hotmail.com", "password": "admin"}
+    ).get_json()["token"]
+    before = app.pool_metrics.snapshot()
+    response = client.get("/api/commands", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    after = app.pool_metrics.snapshot()
+    assert after["checkouts"] - before["checkouts"] == 1
+    assert after["checked_out"] == before["checked_out"]
+
+
+def test_database_url():
+    """
+    Test a database name is resolved in DATABASE_DIR and a URL is kept.
+    """
+    assert database_url("shop").database.endswith("db_data/shop.db")
+    url = database_url("postgresql+psycopg://api@db/shop")
+    assert url.get_backend_name() == "postgresql" and url.database == "shop"
+    assert engine_options(database_url("sqlite://")) == {}
+    assert engine_options(url)["pool_size"] > 0
+
+
+def test_build_engine_sqlite_pragmas(tmp_path):
+    """
+    Test the pool settings and the SQLite pragmas are applied to every connection.
+    """
+    engine = build_engine(f"sqlite:///{tmp_path / 'tuned.db'}")[0]
+    with engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("foreign_keys") == 1
+        assert pragma("busy_timeout") == 5000
+    assert engine.pool.size() == 5
+    engine.dispose()
+
+
+def test_build_async_engine_settings(tmp_path):
+    """
+    Test the asyncio engine gets the pool and the pragmas of the synchronous one.
+    """
+    pytest.importorskip("aiosqlite")
+    import asyncio
+
+    engine = build_engine(f"sqlite:///{tmp_path / 'async.db'}")[0]
+    async_engine = build_async_engine(engine)
+
+    async def read():
+        async with async_engine.connect() as connection:
+            result = await connection.execute(text("PRAGMA foreign_keys"))
+            return result.scalar()
+
+    assert asyncio.run(read()) == 1
+    assert async_engine.sync_engine.pool.size() == engine.pool.size()
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+def test_read_only_routes_use_read_engine(tmp_path):
+    """
+    Test the read-only routes are served by the read-only engine of SQLite.
+    Expects:
+        - A write served by the primary engine, then seen by the read engine
+        - The GET of a product read through the read engine only
+        - Writes refused by the read engine
+    """
+    app = create_app(f"sqlite:///{tmp_path / 'routed.db'}")
+    engine = app.session_factory.kw["bind"]
+    read_engine = app.read_session_factory.kw["bind"]
+    assert read_engine is not engine
+    assert read_engine.url.query["mode"] == "ro"
+    statements = {engine: [], read_engine: []}
+
+    def capture(conn, cursor, statement, *_):
+        statements[conn.engine].append(statement)
+
+    for listened in statements:
+        event.listen(listened, "before_cursor_execute", capture)
+
+    with app.app_context():
+        session = app.session_factory()
+        session.add(Product(name="Routed", description="", category="C", price=1))
+        session.commit()
+        product_id = session.query(Product.id).scalar()
+        session.close()
+    for captured in statements.values():
+        captured.clear()
+
+    response = app.test_client().get(f"/api/product/{product_id}")
+    assert response.status_code == 200 and response.json["name"] == "Routed"
+    assert statements[read_engine] and not statements[engine]
+
+    with pytest.raises(OperationalError, match="readonly"):
+        with read_engine.begin() as connection:
+            connection.execute(text("DELETE FROM products"))
+    app.hash_pool.shutdown()
+    read_engine.dispose()
+    engine.dispose()
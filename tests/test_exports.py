@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import pytest
+from datetime import datetime
+from werkzeug.security import generate_password_hash
+from api_ecommerce.models import Command, CommandLign, Product, User
+
+
+@pytest.fixture
+def export_data(client, session):
+    """
+    Fixture: An admin and a user logged in, and a command of the user with one line.
+    """
+    users = {
+        role: User(
+            email=f"export-{role}@example.com",
+            password=generate_password_hash(role, method="pbkdf2:sha256"),
+            role=role,
+        )
+        for role in ("admin", "user")
+    }
+    product = Product(
+        name='Exported, "quoted"',
+        description="Line\nbreak",
+        category="Export",
+        price=9.5,
+        stock=3,
+        date_creation=datetime(2024, 5, 1, 12, 30),
+    )
+    session.add_all([*users.values(), product])
+    session.commit()
+    command = Command(
+        user_id=users["user"].id,
+        status="validated",
+        address_delivery="Street",
+        date_command=datetime(2024, 5, 2),
+    )
+    session.add(command)
+    session.commit()
+    session.add(CommandLign(command_id=command.id, product_id=product.id, quantity=2))
+    session.commit()
+    headers = {}
+    for role, user in users.items():
+        token = client.post(
+            "/api/auth/login", json={"email": user.email, "password": role}
+        ).get_json()["token"]
+        headers[role] = {"Authorization": f"Bearer {token}"}
+    return {"headers": headers, "product": product, "command": command}
+
+
+def test_export_ndjson(client, export_data):
+    """
+    Test exporting a table as NDJSON.
+    Expects:
+        - Status code 200 with the NDJSON content type and an attachment name
+        - One JSON object per row with every column, ordered by ID
+        - Datetimes in ISO 8601
+    """
+    response = client.get(
+        "/api/export/products", headers=export_data["headers"]["admin"]
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert "products.ndjson" in response.headers["Content-Disposition"]
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    exported = next(row for row in rows if row["id"] == export_data["product"].id)
+    assert exported == {
+        "id": export_data["product"].id,
+        "name": 'Exported, "quoted"',
+        "description": "Line\nbreak",
+        "category": "Export",
+        "price": 9.5,
+        "stock": 3,
+        "date_creation": "2024-05-01T12:30:00",
+    }
+
+
+def test_export_csv(client, export_data):
+    """
+    Test exporting a table as CSV.
+    Expects:
+        - A header row with the column names, then one quoted row per line
+    """
+    response = client.get(
+        "/api/export/commands?format=csv", headers=export_data["headers"]["admin"]
+    )
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    exported = next(row for row in rows if row["id"] == str(export_data["command"].id))
+    assert exported["status"] == "validated"
+    assert exported["date_command"] == "2024-05-02T00:00:00"
+
+    response = client.get(
+        "/api/export/products?format=csv", headers=export_data["headers"]["admin"]
+    )
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert any(row["description"] == "Line\nbreak" for row in rows)
+
+
+def test_export_streams_in_batches(app, client, export_data, monkeypatch):
+    """
+    Test the export is sent as a stream of one chunk per batch of rows.
+    """
+    monkeypatch.setattr("api_ecommerce.app.exports.routes.EXPORT_BATCH_SIZE", 1)
+    response = client.get(
+        "/api/export/commands_lign",
+        headers=export_data["headers"]["admin"],
+        buffered=False,
+    )
+    assert response.is_streamed
+    chunks = [chunk for chunk in response.response if chunk]
+    response.close()
+    assert len(chunks) == b"".join(chunks).count(b"\n") >= 1
+
+
+@pytest.mark.parametrize(
+    "url, role, status",
+    [
+        ("/api/export/users", "admin", 404),
+        ("/api/export/products?format=xml", "admin", 400),
+        ("/api/export/products", "user", 403),
+    ],
+)
+def test_export_errors(client, export_data, url, role, status):
+    """
+    Test unknown tables and formats are rejected, and regular users are forbidden.
+    """
+    response = client.get(url, headers=export_data["headers"][role])
+    assert response.status_code == status
+    assert response.is_json
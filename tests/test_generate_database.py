@@ -0,0 +1,80 @@
+from collections import Counter
+from sqlalchemy import create_engine, select, text
+from werkzeug.security import check_password_hash
+from api_ecommerce.models import Base, User, Product, Command, CommandLign
+from api_ecommerce.scripts.generate_database import generate_data, GENERATED_PASSWORD
+
+
+def generated_engine(path, **options):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    generate_data(engine, users=20, products=200, commands=300, chunksize=64, **options)
+    return engine
+
+
+def dump(engine) -> list:
+    with engine.connect() as connection:
+        return [
+            connection.execute(select(model).order_by(model.id)).all()
+            for model in (User, Product, Command, CommandLign)
+        ]
+
+
+def unsalted(tables: list) -> list:
+    users, *others = tables
+    return [[{**user._asdict(), "password": None} for user in users], *others]
+
+
+def test_generate_data_is_deterministic(tmp_path):
+    """
+    Test the same seed gives the same dataset, and another seed a different one.
+    Only the salt of the password hash differs between two runs.
+    """
+    first = unsalted(dump(generated_engine(tmp_path / "a.db", seed=7)))
+    assert first == unsalted(dump(generated_engine(tmp_path / "b.db", seed=7)))
+    assert first != unsalted(dump(generated_engine(tmp_path / "c.db", seed=8)))
+
+
+def test_generate_data_rows(tmp_path, capsys):
+    """
+    Test the generated rows are consistent and skewed.
+    Expects:
+        - The requested numbers of users, products and commands
+        - One shared password hash and a first admin user
+        - 1 to max_lines distinct products per command, at the product price
+        - A Zipf popularity: the best-selling product far above the median
+        - The generated products indexed for the search
+    """
+    engine = generated_engine(tmp_path / "load.db", max_lines=4)
+    users, products, commands, lines = dump(engine)
+    assert (len(users), len(products), len(commands)) == (20, 200, 300)
+    assert len({user.password for user in users}) == 1
+    assert check_password_hash(users[0].password, GENERATED_PASSWORD)
+    assert [user.role for user in users].count("admin") == 1
+
+    per_command = Counter(line.command_id for line in lines)
+    assert set(per_command) == {command.id for command in commands}
+    assert max(per_command.values()) <= 4
+    assert len({(line.command_id, line.product_id) for line in lines}) == len(lines)
+    prices = {product.id: product.price for product in products}
+    assert all(line.price == prices[line.product_id] for line in lines)
+
+    sales = sorted(Counter(line.product_id for line in lines).values(), reverse=True)
+    assert sales[0] > 10 * sales[len(sales) // 2]
+
+    with engine.connect() as connection:
+        indexed = connection.execute(
+            text("SELECT count(*) FROM products_fts WHERE products_fts MATCH 'produit'")
+        ).scalar()
+    assert indexed == 200
+
+
+def test_generate_data_appends(tmp_path):
+    """
+    Test generating into a filled database appends rows after the existing ids.
+    """
+    engine = generated_engine(tmp_path / "load.db", seed=1)
+    generate_data(engine, users=5, products=10, commands=10, seed=2)
+    users, products, commands, lines = dump(engine)
+    assert (len(users), len(products), len(commands)) == (25, 210, 310)
+    assert {line.command_id for line in lines} == {command.id for command in commands}
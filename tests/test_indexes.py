@@ -0,0 +1,109 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from werkzeug.security import generate_password_hash
+from api_ecommerce.models import Base, Command, CommandLign, Product, User
+from api_ecommerce.scripts.migrate_database import migrate_database
+
+
+@pytest.fixture
+def planner(client, session):
+    """
+    Fixture: Authorization headers of an admin owning a command with one line.
+    """
+    admin = User(
+        email="planner@example.com",
+        password=generate_password_hash("planner", method="pbkdf2:sha256"),
+        role="admin",
+    )
+    product = Product(
+        name="Planner",
+        description="Index",
+        category="Testing",
+        price=1.0,
+        stock=10,
+        date_creation=datetime.datetime.now(),
+    )
+    session.add_all([admin, product])
+    session.commit()
+    command = Command(
+        user_id=admin.id,
+        status="on hold",
+        address_delivery="Street",
+        date_command=datetime.datetime.now(),
+    )
+    session.add(command)
+    session.commit()
+    session.add(CommandLign(command_id=command.id, product_id=product.id, quantity=1))
+    session.commit()
+    token = client.post(
+        "/api/auth/login", json={"email": admin.email, "password": "planner"}
+    ).get_json()["token"]
+    return {"headers": {"Authorization": f"Bearer {token}"}, "command_id": command.id}
+
+
+def query_plan(session, statement, parameters) -> list:
+    """
+    Return the EXPLAIN QUERY PLAN details of a statement.
+    """
+    rows = session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {statement}", parameters
+    )
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/command/{command_id}",
+        "/api/command/{command_id}/lign",
+        "/api/commands?user_id=1",
+        "/api/commands?status=shipped",
+        "/api/commands?date_from=2020-01-01&date_to=2020-02-01",
+        "/api/commands?cursor=WzFd",
+        "/api/products?cursor=WzFd",
+        "/api/products?category=Testing&min_price=1&sort=-price",
+        "/api/products?sort=price&cursor=WzEuMCwxXQ",
+        "/api/products/facets",
+        "/api/products/facets?category=Testing&max_price=100",
+        "/api/product/1",
+    ],
+)
+def test_hot_queries_use_index(client, session, queries, planner, url):
+    """
+    Test every statement of the hot routes is served by an index search.
+    Expects:
+        - No scan of a table or of a whole index in the query plan of any
+          statement, the facets being aggregated once per catalog version
+    """
+    url = url.format(command_id=planner["command_id"])
+    if url.startswith("/api/products/facets"):
+        client.get(url)
+    queries.clear()
+    response = client.get(url, headers=planner["headers"])
+    assert response.status_code in (200, 404)
+    statements = [query for query in queries if query[0].lstrip().startswith("SELECT")]
+    assert statements
+    for statement, parameters in statements:
+        for detail in query_plan(session, statement, parameters):
+            assert not detail.startswith("SCAN"), f"{detail} in {statement}"
+
+
+def test_migrate_database_creates_missing_indexes(tmp_path):
+    """
+    Test the migration adds the declared indexes to a database created without them.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(text(f"DROP INDEX {index.name}"))
+
+    created = migrate_database(engine)
+    expected = {index.name for t in Base.metadata.sorted_tables for index in t.indexes}
+    assert set(created) == expected
+    assert migrate_database(engine) == []
+    assert {
+        index["name"] for index in inspect(engine).get_indexes("commands_lign")
+    } == {"ix_commands_lign_command_id_product_id", "ix_commands_lign_product_id"}
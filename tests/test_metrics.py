@@ -0,0 +1,86 @@
+import re
+from api_ecommerce.app.metrics import Histogram, RequestMetrics
+from api_ecommerce.models import Product
+
+
+def sample(text, line):
+    """
+    Return the value of a sample of a Prometheus text, 0 if it is missing.
+    """
+    match = re.search(rf"^{re.escape(line)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+def test_histogram_buckets():
+    """
+    Test the buckets are cumulative, a value on a bound counted in its bucket.
+    """
+    histogram = Histogram((1, 5))
+    for value in (0, 1, 3, 9):
+        histogram.observe(value)
+    assert histogram.samples("h", 'endpoint="e",') == [
+        'h_bucket{endpoint="e",le="1"} 2',
+        'h_bucket{endpoint="e",le="5"} 3',
+        'h_bucket{endpoint="e",le="+Inf"} 4',
+        'h_sum{endpoint="e"} 13.0',
+        'h_count{endpoint="e"} 4',
+    ]
+
+
+def test_request_metrics_render():
+    """
+    Test the requests are counted by endpoint, method and status.
+    """
+    metrics = RequestMetrics()
+    metrics.record("products.get_product", "GET", 200, 0.01, 1, 0.001)
+    metrics.record("products.get_product", "GET", 200, 0.02, 0, 0.0)
+    metrics.record("products.get_product", "GET", 404, 0.01, 1, 0.001)
+    text = "\n".join(metrics.render())
+    labels = 'endpoint="products.get_product",method="GET"'
+    assert sample(text, f'api_requests_total{{{labels},status="200"}}') == 2
+    assert sample(text, f'api_requests_total{{{labels},status="404"}}') == 1
+    assert (
+        sample(
+            text,
+            'api_request_sql_statements_bucket{endpoint="products.get_product",le="0"}',
+        )
+        == 1
+    )
+
+
+def test_metrics_endpoint(client, session):
+    """
+    Test '/metrics' exposes the requests served with their SQL statements.
+    Expects:
+        - The Prometheus content type and the requests counted once served
+        - The SQL statements of the route in its histogram
+        - The pool, cache and hash pool gauges
+        - The unknown URLs counted as 'unmatched'
+    """
+    product = Product(name="Metric", description="", category="C", price=1, stock=1)
+    session.add(product)
+    session.commit()
+    endpoint = 'endpoint="products.get_product"'
+
+    before = client.get("/metrics").get_data(as_text=True)
+    assert client.get(f"/api/product/{product.id}").status_code == 200
+    assert client.get("/api/nowhere").status_code == 404
+    response = client.get("/metrics")
+
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    for name in ("api_requests_total", "api_request_sql_statements_count"):
+        line = f'{name}{{{endpoint},method="GET",status="200"}}'
+        if name.endswith("_count"):
+            line = f"{name}{{{endpoint}}}"
+        assert sample(text, line) == sample(before, line) + 1
+    line = f"api_request_sql_statements_sum{{{endpoint}}}"
+    assert sample(text, line) >= sample(before, line) + 1
+    line = 'api_requests_total{endpoint="unmatched",method="GET",status="404"}'
+    assert sample(text, line) == sample(before, line) + 1
+    for gauge in (
+        "api_db_pool_checkouts",
+        "api_product_cache_hits",
+        "api_hash_pool_queued",
+    ):
+        assert re.search(rf"^{gauge} \d", text, re.MULTILINE)
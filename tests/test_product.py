@@ -1,5 +1,8 @@
+import json
 import pytest
-from api_ecommerce.models import Product
+from api_ecommerce.models import Command, CommandLign, Product, User
+from api_ecommerce.app.products.routes import build_search_query
+from werkzeug.security import generate_password_hash
 from datetime import datetime
 
 
@@ -61,18 +64,327 @@ def test_get_product_not_found(client):
     assert "Product not found" in response.get_json().get("error", "")
 
 
+def test_get_product_cached(client, session, product_in_db, admin_token):
+    """
+    Test a product is read from the cache after the first request,
+    and invalidated when it is updated.
+    Expects:
+        - One miss then one hit in the cache counters
+        - The updated name after a PUT
+    """
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    before = client.get("/api/products/cache", headers=headers).get_json()
+    client.get(f"/api/product/{product_in_db.id}")
+    client.get(f"/api/product/{product_in_db.id}")
+    after = client.get("/api/products/cache", headers=headers).get_json()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
+
+    client.put(
+        f"/api/product/{product_in_db.id}", json={"name": "Renamed"}, headers=headers
+    )
+    response = client.get(f"/api/product/{product_in_db.id}")
+    assert response.get_json()["name"] == "Renamed"
+
+
+def test_get_product_cache_invalidated_on_delete(
+    client, session, product_in_db, admin_token
+):
+    """
+    Test a deleted product is no longer served from the cache.
+    Expects:
+        - Status code 404 (Not Found) after the deletion
+    """
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert client.get(f"/api/product/{product_in_db.id}").status_code == 200
+    client.delete(f"/api/product/{product_in_db.id}", headers=headers)
+    assert client.get(f"/api/product/{product_in_db.id}").status_code == 404
+
+
 def test_get_products_list(client, session, product_in_db):
     """
-    Test retrieving a list of all products.
+    Test retrieving the paginated list of products.
     Expects:
         - Status code 200 (OK)
-        - Response contains a list with at least one product
+        - Pages of products followed through the 'next' cursor
+        - The new product on one of the pages
+    """
+    ids, cursor = [], None
+    while True:
+        params = {"limit": 20} if cursor is None else {"limit": 20, "cursor": cursor}
+        response = client.get("/api/products", query_string=params)
+        assert response.status_code == 200
+        json = response.get_json()
+        assert len(json["products"]) <= 20
+        ids += [prod["id"] for prod in json["products"]]
+        cursor = json["next"]
+        if cursor is None:
+            break
+    assert product_in_db.id in ids
+    assert ids == sorted(set(ids))
+
+
+def test_get_products_fields(client, session, product_in_db):
     """
-    response = client.get("/api/products")
+    Test projecting the product list on the requested fields.
+    Expects:
+        - Status code 200 (OK)
+        - Only 'id' and the requested fields in each product
+    """
+    response = client.get("/api/products", query_string={"fields": "price,category"})
+    assert response.status_code == 200
+    for prod in response.get_json()["products"]:
+        assert set(prod) == {"id", "price", "category"}
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"fields": "password"},
+        {"limit": 0},
+        {"limit": "ten"},
+        {"cursor": "not-a-cursor"},
+    ],
+)
+def test_get_products_bad_parameters(client, params):
+    """
+    Test the product list rejects invalid query parameters.
+    Expects:
+        - Status code 400 (Bad Request)
+    """
+    response = client.get("/api/products", query_string=params)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.fixture
+def priced_products(session):
+    """
+    Fixture: Create five products of a dedicated category, priced from 10 to 50.
+    Returns:
+        list of Product instances
+    """
+    products = [
+        Product(
+            name=f"Facet {price}",
+            description="Priced product",
+            category="Facets",
+            price=price,
+            stock=1,
+            date_creation=datetime(2024, 1, 1),
+        )
+        for price in (30.0, 10.0, 50.0, 20.0, 40.0)
+    ]
+    session.add_all(products)
+    session.commit()
+    return products
+
+
+def test_get_products_filtered_and_sorted(client, session, priced_products):
+    """
+    Test filtering the product list by category and price, sorted by descending price.
+    Expects:
+        - Only the products in the price range, most expensive first, across pages
+    """
+    params = {
+        "category": "Facets",
+        "min_price": 15,
+        "max_price": 45,
+        "sort": "-price",
+        "fields": "price",
+        "limit": 2,
+    }
+    first = client.get("/api/products", query_string=params).get_json()
+    params["cursor"] = first["next"]
+    second = client.get("/api/products", query_string=params).get_json()
+    prices = [prod["price"] for prod in first["products"] + second["products"]]
+    assert prices == [40.0, 30.0, 20.0]
+    assert second["next"] is None
+    assert set(first["products"][0]) == {"id", "price"}
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"sort": "stock"},
+        {"min_price": "cheap"},
+        {"min_price": "nan"},
+        {"max_price": "inf"},
+        {"sort": "price", "cursor": "WzFd"},
+    ],
+)
+def test_get_products_bad_filters(client, params):
+    """
+    Test the product list rejects invalid filters, sorts and cursors.
+    Expects:
+        - Status code 400 (Bad Request)
+    """
+    response = client.get("/api/products", query_string=params)
+    assert response.status_code == 400
+
+
+def test_get_product_facets(client, session, priced_products):
+    """
+    Test the category counts and the price histogram of the products.
+    Expects:
+        - The category counted with its five products
+        - Five price ranges of one product each for the category
+    """
+    response = client.get(
+        "/api/products/facets", query_string={"category": "Facets", "buckets": 5}
+    )
     assert response.status_code == 200
     json = response.get_json()
-    assert isinstance(json, list)
-    assert any(prod["id"] == product_in_db.id for prod in json)
+    assert {"category": "Facets", "count": 5} in json["categories"]
+    assert json["price"]["min"] == 10.0 and json["price"]["max"] == 50.0
+    assert [bucket["count"] for bucket in json["price"]["histogram"]] == [1] * 5
+
+    json = client.get(
+        "/api/products/facets", query_string={"min_price": 35, "max_price": 45}
+    ).get_json()
+    assert {"category": "Facets", "count": 1} in json["categories"]
+
+
+def test_get_product_facets_cached(
+    client, session, queries, priced_products, admin_token
+):
+    """
+    Test the facets are aggregated once per catalog version.
+    Expects:
+        - Only the catalog version read while the catalog is unchanged
+        - New counts once a product is created
+    """
+    url = "/api/products/facets?category=Facets"
+    first = client.get(url).get_json()
+    queries.clear()
+    assert client.get(url).get_json() == first
+    assert len(queries) == 1
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    product = {"name": "Facet 60", "description": "", "category": "Facets"}
+    response = client.post(
+        "/api/product", json={**product, "price": 60.0, "stock": 1}, headers=headers
+    )
+    assert response.status_code == 201
+    json = client.get(url).get_json()
+    assert {"category": "Facets", "count": 6} in json["categories"]
+    assert json["price"]["max"] == 60.0
+
+
+@pytest.mark.parametrize("params", [{"min_price": "nan"}, {"max_price": "-inf"}])
+def test_get_product_facets_bad_prices(client, params):
+    """
+    Test the facets reject prices which are not finite numbers.
+    """
+    response = client.get("/api/products/facets", query_string=params)
+    assert response.status_code == 400
+    assert "must be numbers" in response.get_json()["error"]
+
+
+def test_get_product_facets_bad_buckets(client):
+    """
+    Test the facets reject an invalid number of price ranges.
+    Expects:
+        - Status code 400 (Bad Request)
+    """
+    response = client.get("/api/products/facets", query_string={"buckets": 0})
+    assert response.status_code == 400
+
+
+def test_search_products_ranked(client, session, product_in_db):
+    """
+    Test the full-text search ranks a match on the name before a match on the description.
+    Expects:
+        - Status code 200 (OK)
+        - The product named after the word first
+    """
+    session.add(
+        Product(
+            name="Gadget",
+            description="Works with TestProduct",
+            category="Testing",
+            price=1.0,
+            stock=1,
+            date_creation=datetime(2024, 1, 2),
+        )
+    )
+    session.commit()
+    response = client.get("/api/products/search", query_string={"q": "testprod"})
+    assert response.status_code == 200
+    names = [prod["name"] for prod in response.get_json()["products"]]
+    assert names == ["TestProduct", "Gadget"]
+
+
+def test_search_products_follows_writes(client, session, product_in_db, admin_token):
+    """
+    Test the search index follows the updates and deletions of products.
+    Expects:
+        - The product found under its new name only, then not found once deleted
+    """
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    client.put(
+        f"/api/product/{product_in_db.id}", json={"name": "Zanzibar"}, headers=headers
+    )
+
+    def search(q):
+        return client.get("/api/products/search", query_string={"q": q})
+
+    assert [p["id"] for p in search("zanzibar").get_json()["products"]] == [
+        product_in_db.id
+    ]
+    assert search("testproduct").get_json()["products"] == []
+
+    client.delete(f"/api/product/{product_in_db.id}", headers=headers)
+    assert search("zanzibar").get_json()["products"] == []
+
+
+def test_search_products_pagination(client, session):
+    """
+    Test the search results are paginated with the 'next' cursor.
+    Expects:
+        - Two full pages then a last page, without duplicates
+    """
+    for i in range(5):
+        session.add(
+            Product(
+                name=f"Paginated {i}",
+                description="Search page",
+                category="Testing",
+                price=1.0,
+                stock=1,
+                date_creation=datetime(2024, 1, 1),
+            )
+        )
+    session.commit()
+    ids, cursor = [], None
+    for _ in range(3):
+        params = {"q": "paginated", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        json = client.get("/api/products/search", query_string=params).get_json()
+        ids += [prod["id"] for prod in json["products"]]
+        cursor = json["next"]
+    assert len(ids) == len(set(ids)) == 5
+    assert cursor is None
+
+
+@pytest.mark.parametrize("query", ["", "  *  ", "()", "a b"])
+def test_search_products_without_words(client, query):
+    """
+    Test the search requires at least one word long enough.
+    Expects:
+        - Status code 400 (Bad Request)
+    """
+    response = client.get("/api/products/search", query_string={"q": query})
+    assert response.status_code == 400
+    assert "q is required" in response.get_json()["error"]
+
+
+def test_build_search_query_min_length():
+    """
+    Test the words too short to be searched are left out of the query.
+    """
+    assert build_search_query("t-shirt XL a") == '"shirt"* "XL"*'
 
 
 def test_create_product_success(client, session, admin_token):
@@ -111,6 +423,95 @@ def test_create_product_missing_fields(client, admin_token):
     assert "Missing fields" in response.get_json()["error"]
 
 
+def test_bulk_import_ndjson(client, session, product_in_db, admin_token):
+    """
+    Test importing products from a streamed NDJSON body.
+    Expects:
+        - Status code 200 (OK)
+        - Valid rows inserted, or updated when the name exists
+        - Invalid rows reported with their line number
+    """
+    lines = [
+        {"name": "Bulk A", "description": "d", "category": "Bulk", "price": 1.5},
+        {"name": "Bulk B", "description": "d", "category": "Bulk", "price": "2"},
+        {"name": "Bulk C", "description": "d"},
+        "not json",
+        {"name": "TestProduct", "description": "new", "category": "Bulk", "price": 9},
+    ]
+    body = "\n".join(
+        line if isinstance(line, str) else json.dumps(line) for line in lines
+    )
+    headers = {
+        "Authorization": f"Bearer {admin_token}",
+        "Content-Type": "application/x-ndjson",
+    }
+    response = client.post("/api/products/bulk", data=body, headers=headers)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report["read"], report["imported"], report["rejected"]) == (5, 3, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    session.refresh(product_in_db)
+    assert (product_in_db.description, product_in_db.price) == ("new", 9.0)
+    assert session.query(Product).filter_by(category="Bulk").count() == 3
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"price": "nan"},
+        {"price": "inf"},
+        {"price": -1},
+        {"price": 1, "stock": -2},
+        {"price": 1, "stock": 1e309},
+    ],
+)
+def test_bulk_import_rejects_bad_numbers(client, session, admin_token, values):
+    """
+    Test a row with a non-finite or negative price or stock is rejected alone.
+    """
+    row = {"name": "Bulk bad", "description": "d", "category": "BulkBad", **values}
+    good = {"name": "Bulk good", "description": "d", "category": "BulkBad", "price": 1}
+    body = "\n".join(json.dumps(line) for line in (row, good))
+    headers = {
+        "Authorization": f"Bearer {admin_token}",
+        "Content-Type": "application/x-ndjson",
+    }
+    response = client.post("/api/products/bulk", data=body, headers=headers)
+    report = response.get_json()
+    assert (report["imported"], report["rejected"]) == (1, 1)
+    assert report["errors"][0]["line"] == 1
+    assert session.query(Product).filter_by(category="BulkBad").count() == 1
+
+
+def test_bulk_import_csv(client, session, admin_token, monkeypatch):
+    """
+    Test importing products from a CSV body, committed in several chunks.
+    Expects:
+        - Status code 200 (OK)
+        - Every row imported
+    """
+    monkeypatch.setattr("api_ecommerce.app.products.routes.PRODUCT_BULK_CHUNK_SIZE", 2)
+    rows = [f"Csv {i},Imported,Bulk CSV,{i}.5,{i}" for i in range(5)]
+    body = "\n".join(["name,description,category,price,stock"] + rows)
+    headers = {"Authorization": f"Bearer {admin_token}", "Content-Type": "text/csv"}
+    response = client.post("/api/products/bulk", data=body, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["imported"] == 5
+    stocks = [p.stock for p in session.query(Product).filter_by(category="Bulk CSV")]
+    assert sorted(stocks) == [0, 1, 2, 3, 4]
+
+
+def test_bulk_import_unsupported_type(client, admin_token):
+    """
+    Test the bulk import refuses other content types.
+    Expects:
+        - Status code 415 (Unsupported Media Type)
+    """
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.post("/api/products/bulk", json=[], headers=headers)
+    assert response.status_code == 415
+
+
 def test_update_product_success(client, session, product_in_db, admin_token):
     """
     Test updating all fields of an existing product.
@@ -179,3 +580,111 @@ def test_delete_product_not_found(client, admin_token):
     response = client.delete("/api/product/99999", headers=headers)
     assert response.status_code == 404
     assert "Product not found" in response.get_json()["error"]
+
+
+def test_delete_product_ordered(client, session, product_in_db, admin_token):
+    """
+    Test deleting a product which is part of a command.
+    Expects:
+        - Status code 409 (Conflict), the foreign keys being enforced
+        - The product kept
+    """
+    user = session.query(User).filter_by(role="admin").first()
+    command = Command(
+        user_id=user.id,
+        status="on hold",
+        address_delivery="Street",
+        date_command=datetime.now(),
+    )
+    session.add(command)
+    session.flush()
+    session.add(
+        CommandLign(
+            command_id=command.id, product_id=product_in_db.id, quantity=1, price=1
+        )
+    )
+    session.commit()
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    response = client.delete(f"/api/product/{product_in_db.id}", headers=headers)
+    assert response.status_code == 409
+    assert "error" in response.get_json()
+    assert client.get(f"/api/product/{product_in_db.id}").status_code == 200
+
+
+def test_get_product_conditional(client, session, product_in_db, admin_token):
+    """
+    Test the conditional GET of a product.
+    Expects:
+        - An ETag and a Cache-Control header
+        - 304 (Not Modified) with an empty body for the same ETag
+        - A new ETag once the product is updated
+    """
+    url = f"/api/product/{product_in_db.id}"
+    response = client.get(url)
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "public, no-cache"
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    client.put(url, json={"price": 43.0}, headers=headers)
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/products?category=Testing",
+        "/api/products/facets",
+        "/api/products/search?q=test",
+    ],
+)
+def test_catalog_conditional(client, session, queries, product_in_db, url):
+    """
+    Test the conditional GET of the product listings.
+    Expects:
+        - 304 for the same ETag, answered with the catalog version query only
+        - A different ETag for different parameters
+        - A new ETag after any write to the products, an order included
+    """
+    etag = client.get(url).headers["ETag"]
+    assert client.get(url + "&limit=1").headers.get("ETag") != etag
+
+    queries.clear()
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert len(queries) == 1
+
+    user = User(
+        email="etag@example.com",
+        password=generate_password_hash("etag", method="pbkdf2:sha256"),
+        role="user",
+    )
+    session.add(user)
+    session.commit()
+    token = client.post(
+        "/api/auth/login", json={"email": user.email, "password": "etag"}
+    ).get_json()["token"]
+    response = client.post(
+        "/api/command/",
+        json={"product_id": [product_in_db.id], "address_delivery": "Street"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 201
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_catalog_conditional_skips_errors(client):
+    """
+    Test error responses of the product listings have no ETag.
+    """
+    response = client.get("/api/products?limit=abc")
+    assert response.status_code == 400
+    assert "ETag" not in response.headers
@@ -0,0 +1,196 @@
+import datetime
+import pytest
+from werkzeug.security import generate_password_hash
+from api_ecommerce.models import Command, CommandLign, Product, User
+
+# Maximum number of SQL statements issued by each endpoint. The user cache is
+# cleared before each test, so authenticated requests include loading the user.
+# Product listings read the catalog version and product writes increment it.
+QUERY_BUDGETS = {
+    "auth.login": 1,
+    "auth.register": 2,
+    "auth.get_hash_pool_stats": 1,
+    "products.get_product": 1,
+    "products.get_products": 2,
+    "products.get_product_facets": 4,
+    "products.search_products": 2,
+    "products.get_product_cache_stats": 1,
+    "products.create_product": 4,
+    "products.bulk_import_products": 3,
+    "products.update_product": 5,
+    "products.delete_product": 4,
+    "commands.list_commands": 2,
+    "commands.get_command": 2,
+    "commands.get_command_lign": 3,
+    "commands.create_command": 6,
+    "commands.update_command_status": 4,
+    "exports.export_table": 2,
+    "metrics.get_metrics": 0,
+}
+PRODUCT = {"description": "Query", "category": "Budget", "price": 5.0, "stock": 100}
+BULK_BODY = "".join(
+    f'{{"name": "Bulk {i}", "description": "d", "category": "c", "price": {i}}}\n'
+    for i in range(1, 21)
+)
+
+
+@pytest.fixture
+def budget(client, session):
+    """
+    Fixture: An admin and a user logged in, a command of the user with 10 lines
+    and a product left out of commands (deletable).
+    """
+    now = datetime.datetime.now()
+    users = {
+        role: User(
+            email=f"budget-{role}@example.com",
+            password=generate_password_hash(role, method="pbkdf2:sha256"),
+            role=role,
+        )
+        for role in ("admin", "user")
+    }
+    products = [
+        Product(**PRODUCT, name=f"Budget {i}", date_creation=now) for i in range(10)
+    ]
+    spare = Product(**PRODUCT, name="Budget spare", date_creation=now)
+    session.add_all([*users.values(), *products, spare])
+    session.commit()
+    command = Command(
+        user_id=users["user"].id,
+        status="on hold",
+        address_delivery="Street",
+        date_command=now,
+    )
+    session.add(command)
+    session.commit()
+    session.add_all(
+        CommandLign(command_id=command.id, product_id=product.id, quantity=1, price=5)
+        for product in products
+    )
+    session.commit()
+    headers = {}
+    for role, user in users.items():
+        token = client.post(
+            "/api/auth/login", json={"email": user.email, "password": role}
+        ).get_json()["token"]
+        headers[role] = {"Authorization": f"Bearer {token}"}
+    return {
+        "headers": headers,
+        "product_ids": [product.id for product in products],
+        "spare_product_id": spare.id,
+        "command_id": command.id,
+    }
+
+
+def endpoint_requests(budget: dict) -> dict:
+    """
+    Build one request per endpoint: method, URL, role of the caller and body.
+    """
+    product_id = budget["product_ids"][0]
+    command_id = budget["command_id"]
+    return {
+        "auth.login": (
+            "POST",
+            "/api/auth/login",
+            None,
+            {"json": {"email": "budget-user@example.com", "password": "user"}},
+        ),
+        "auth.register": (
+            "POST",
+            "/api/auth/register",
+            None,
+            {"json": {"email": "budget-new@example.com", "password": "new"}},
+        ),
+        "auth.get_hash_pool_stats": ("GET", "/api/auth/hash-pool", "admin", {}),
+        "products.get_product": ("GET", f"/api/product/{product_id}", None, {}),
+        "products.get_products": (
+            "GET",
+            "/api/products?category=Budget&sort=-price",
+            None,
+            {},
+        ),
+        "products.get_product_facets": ("GET", "/api/products/facets", None, {}),
+        "products.search_products": ("GET", "/api/products/search?q=budget", None, {}),
+        "products.get_product_cache_stats": ("GET", "/api/products/cache", "admin", {}),
+        "products.create_product": (
+            "POST",
+            "/api/product",
+            "admin",
+            {"json": {**PRODUCT, "name": "Budget new"}},
+        ),
+        "products.bulk_import_products": (
+            "POST",
+            "/api/products/bulk",
+            "admin",
+            {"data": BULK_BODY, "content_type": "application/x-ndjson"},
+        ),
+        "products.update_product": (
+            "PUT",
+            f"/api/product/{product_id}",
+            "admin",
+            {"json": {"price": 6.0}},
+        ),
+        "products.delete_product": (
+            "DELETE",
+            f"/api/product/{budget['spare_product_id']}",
+            "admin",
+            {},
+        ),
+        "commands.list_commands": ("GET", "/api/commands", "user", {}),
+        "commands.get_command": ("GET", f"/api/command/{command_id}", "user", {}),
+        "commands.get_command_lign": (
+            "GET",
+            f"/api/command/{command_id}/lign",
+            "user",
+            {},
+        ),
+        "commands.create_command": (
+            "POST",
+            "/api/command/",
+            "user",
+            {
+                "json": {
+                    "product_id": budget["product_ids"] * 2,
+                    "address_delivery": "Street",
+                }
+            },
+        ),
+        "commands.update_command_status": (
+            "PATCH",
+            f"/api/command/{command_id}",
+            "admin",
+            {"json": {"status": "shipped"}},
+        ),
+        "exports.export_table": ("GET", "/api/export/commands_lign", "admin", {}),
+        "metrics.get_metrics": ("GET", "/metrics", None, {}),
+    }
+
+
+def test_every_endpoint_has_a_budget(app):
+    """
+    Test every route of the API has a query budget.
+    """
+    endpoints = {
+        rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint != "static"
+    }
+    assert endpoints == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("endpoint", list(QUERY_BUDGETS))
+def test_query_budget(client, queries, budget, endpoint):
+    """
+    Test an endpoint succeeds within its query budget.
+    Expects:
+        - A successful response
+        - At most QUERY_BUDGETS[endpoint] SQL statements, whatever the number of
+          products or lines involved (10 here)
+    """
+    method, url, role, kwargs = endpoint_requests(budget)[endpoint]
+    headers = budget["headers"][role] if role else {}
+
+    queries.clear()
+    response = client.open(url, method=method, headers=headers, **kwargs)
+
+    assert response.status_code < 300, response.get_json()
+    statements = "\n".join(statement for statement, _ in queries)
+    assert len(queries) <= QUERY_BUDGETS[endpoint], statements
@@ -0,0 +1,130 @@
+import datetime
+import decimal
+import uuid
+import pytest
+from flask import Flask
+from sqlalchemy import select
+from werkzeug.http import http_date as werkzeug_http_date
+from api_ecommerce.models import Product, Command
+from api_ecommerce.app.json_provider import (
+    OrjsonProvider,
+    http_date,
+    init_json_provider,
+)
+from api_ecommerce.app.serializers import (
+    PRODUCT_SERIALIZER,
+    COMMAND_LIST_SERIALIZER,
+)
+
+
+@pytest.fixture
+def product(session):
+    """
+    Fixture: A product saved in the database.
+    """
+    product = Product(
+        name="Serialized", description="Desc", category="Cat", price=9.5, stock=3
+    )
+    session.add(product)
+    session.commit()
+    return product
+
+
+def test_serializer_rows_and_instances(session, product):
+    """
+    Test an ORM instance and a Row of a Core select give the same dicts.
+    Expects:
+        - Every field by default, only the selected ones otherwise
+        - Rows read by position, whatever the order of their columns
+    """
+    expected = {
+        "id": product.id,
+        "name": "Serialized",
+        "description": "Desc",
+        "category": "Cat",
+        "price": 9.5,
+        "stock": 3,
+    }
+    assert PRODUCT_SERIALIZER.dump(product) == expected
+    assert PRODUCT_SERIALIZER.dump(product, ["id", "price"]) == {
+        "id": product.id,
+        "price": 9.5,
+    }
+
+    rows = session.execute(
+        select(Product.stock, Product.price, Product.id, Product.name).where(
+            Product.id == product.id
+        )
+    ).all()
+    assert PRODUCT_SERIALIZER.dump_many(rows, ["id", "name", "price"]) == [
+        {"id": product.id, "name": "Serialized", "price": 9.5}
+    ]
+    assert PRODUCT_SERIALIZER.dump_many(rows, ["stock"]) == [{"stock": 3}]
+    assert PRODUCT_SERIALIZER.dump_many([]) == []
+
+
+def test_serializer_renames_keys():
+    """
+    Test the renamed fields are written under their output key.
+    """
+    date = datetime.datetime(2025, 1, 2, 3, 4, 5)
+    command = Command(
+        id=1, user_id=1, status="on hold", address_delivery="Here", date_command=date
+    )
+    assert COMMAND_LIST_SERIALIZER.dump(command) == {
+        "command_id": 1,
+        "status": "on hold",
+        "address_delivery": "Here",
+        "date_command": date,
+    }
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime.datetime(2025, 1, 2, 3, 4, 5, 678),
+        datetime.datetime(1999, 12, 31, 23, 59, 59),
+        datetime.datetime(
+            2025, 6, 1, 1, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=2))
+        ),
+        datetime.datetime(2024, 2, 29, tzinfo=datetime.timezone.utc),
+        datetime.date(2025, 3, 9),
+    ],
+)
+def test_http_date(value):
+    """
+    Test dates are formatted as werkzeug does for the default provider.
+    """
+    assert http_date(value) == werkzeug_http_date(value)
+
+
+def test_orjson_provider_matches_default():
+    """
+    Test the orjson provider gives the responses of the default provider.
+    Expects:
+        - The same bytes for ASCII content (sorted keys, compact, HTTP dates)
+        - The same decoded content otherwise
+    """
+    data = {
+        "b": [1, 2.5, None, True, "text"],
+        "a": datetime.datetime(2025, 1, 2, 3, 4, 5),
+        "d": datetime.date(2025, 1, 2),
+        "c": {"z": decimal.Decimal("1.5"), "y": uuid.UUID(int=1)},
+    }
+    responses = {}
+    for provider in ("default", "orjson"):
+        app = Flask(__name__)
+        init_json_provider(app, provider)
+        with app.app_context():
+            responses[provider] = app.json.response(data).get_data()
+            assert app.json.loads(app.json.dumps({"é": 1})) == {"é": 1}
+    assert isinstance(app.json, OrjsonProvider)
+    assert responses["orjson"] == responses["default"]
+
+
+def test_init_json_provider_unknown():
+    """
+    Test an unknown provider is rejected.
+    """
+    with pytest.raises(ValueError):
+        init_json_provider(Flask(__name__), "unknown")
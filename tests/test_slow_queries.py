@@ -0,0 +1,95 @@
+import json
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, select, text
+from api_ecommerce.models import Base, Product
+from api_ecommerce.slow_queries import init_slow_query_log, logger
+
+
+@pytest.fixture
+def slow_log(tmp_path):
+    """
+    Fixture: An engine logging its slow statements, and the path of the log.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    Base.metadata.create_all(engine)
+    path = tmp_path / "logs" / "slow.log"
+    init_slow_query_log(engine, threshold=0.0, path=str(path))
+    yield engine, path
+    for handler in list(logger.handlers):
+        if getattr(handler, "baseFilename", None) == str(path):
+            logger.removeHandler(handler)
+            handler.close()
+    engine.dispose()
+
+
+def read_log(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_slow_query_logged_with_plan(slow_log):
+    """
+    Test a slow statement is logged with its parameters, route and query plan.
+    Expects:
+        - One JSON entry per statement, its rows still fetched by the caller
+        - The endpoint and URL of the request
+        - The SQLite plan of the statement
+    """
+    engine, path = slow_log
+    app = Flask(__name__)
+    app.add_url_rule("/api/products", "products.get_products", lambda: "")
+    with engine.begin() as connection:
+        connection.execute(
+            Product.__table__.insert(),
+            [
+                {"name": f"P{i}", "description": "", "category": "C", "price": i}
+                for i in range(3)
+            ],
+        )
+    path.write_text("")
+
+    with app.test_request_context("/api/products?category=C"):
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(Product.id).where(Product.category == "C")
+            ).all()
+
+    assert len(rows) == 3
+    (entry,) = read_log(path)
+    assert entry["parameters"] == ["C"]
+    assert entry["endpoint"] == "products.get_products"
+    assert entry["path"] == "/api/products?category=C"
+    assert entry["duration"] >= 0
+    assert any("products" in step for step in entry["plan"])
+
+
+def test_slow_query_executemany(slow_log):
+    """
+    Test an executemany is logged outside requests with a sample of its parameters.
+    """
+    engine, path = slow_log
+    path.write_text("")
+    with engine.begin() as connection:
+        connection.execute(
+            Product.__table__.insert(),
+            [
+                {"name": f"P{i}", "description": "", "category": "C", "price": i}
+                for i in range(25)
+            ],
+        )
+    entries = [e for e in read_log(path) if e["statement"].startswith("INSERT")]
+    assert entries[0]["parameter_sets"] == 25
+    assert len(entries[0]["parameters"]) == 10
+    assert entries[0]["endpoint"] is None
+    assert entries[0]["plan"] is not None
+
+
+def test_slow_query_log_disabled(tmp_path):
+    """
+    Test nothing is hooked nor written without a threshold.
+    """
+    engine = create_engine("sqlite://")
+    init_slow_query_log(engine, threshold=None, path=str(tmp_path / "none.log"))
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    assert not (tmp_path / "none.log").exists()
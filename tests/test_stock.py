@@ -0,0 +1,89 @@
+import datetime
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from api_ecommerce.models import Base, Product
+from api_ecommerce.app.commands.stock import StockError, reserve_stock
+
+
+@pytest.fixture
+def stock_factory(tmp_path):
+    """
+    Fixture: A session factory on a fresh database file holding two products,
+    shared by several threads.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'stock.db'}",
+        connect_args={"timeout": 30},
+        pool_size=16,
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as session:
+        for name, stock in (("Chips", 50), ("Soda", 50)):
+            session.add(
+                Product(
+                    name=name,
+                    description="Stress",
+                    category="Snack",
+                    price=1.0,
+                    stock=stock,
+                    date_creation=datetime.datetime.now(),
+                )
+            )
+        session.commit()
+    yield factory
+    engine.dispose()
+
+
+def test_reserve_stock_all_or_nothing(stock_factory):
+    """
+    Test a reservation is refused as a whole when one product has not enough stock.
+    """
+    with stock_factory() as session:
+        with pytest.raises(StockError):
+            reserve_stock(session, {1: 5, 2: 51})
+        session.rollback()
+        reserve_stock(session, {1: 5, 2: 50})
+        session.commit()
+        assert [p.stock for p in session.query(Product).order_by(Product.id)] == [
+            45,
+            0,
+        ]
+
+
+def test_reserve_stock_concurrent_no_oversell(stock_factory):
+    """
+    Test many threads ordering the same products never oversell them nor lose an update.
+    Expects:
+        - Exactly as many successful reservations as units in stock
+        - The stock at zero, never negative
+    """
+    successes, failures = [], []
+    barrier = threading.Barrier(40)
+
+    def order(quantity):
+        barrier.wait()
+        for _ in range(5):
+            with stock_factory() as session:
+                try:
+                    reserve_stock(session, {1: quantity, 2: 1})
+                    session.commit()
+                    successes.append(quantity)
+                except StockError:
+                    session.rollback()
+                    failures.append(quantity)
+
+    threads = [threading.Thread(target=order, args=(1 + i % 2,)) for i in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with stock_factory() as session:
+        chips, soda = [p.stock for p in session.query(Product).order_by(Product.id)]
+    assert len(successes) + len(failures) == 200
+    assert chips == 50 - sum(successes) and chips >= 0
+    assert soda == 50 - len(successes) and soda >= 0
+    assert chips <= 1 or soda == 0